@@ -1,12 +1,36 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Annotated, Optional, List, Dict, Any, Tuple
 import torch
 from transformers import DistilBertTokenizerFast, DistilBertForSequenceClassification
 from sklearn.preprocessing import LabelEncoder
+from decimal import Decimal
+import hmac
+import json
+import os
 import pickle
+import threading
+import time
+import numpy as np
 import pandas as pd
+from dialog_state import DialogMachine, DialogState, SessionState, Turn
+from session_store import SessionStore
+from batching import MicroBatcher
+from autotune import autotune, load_tuning
+from shadow import ShadowEvaluator
+from compression import CompressionMiddleware, choose_encoding
+from catalog import CatalogEntry, build_entry
+from rate_limit import ConcurrencyLimit, LocalBuckets, RateLimited, RateLimiter, RedisBuckets
+from profiling import RequestProfiler, StackSampler
+from market_data import MarketDataService, StubMarketUpstream, SWRCache, create_http_upstream
+from chart_store import PERIODS, SYMBOL_PATTERN, ChartStore, FinnhubCandles, StubCandles
+from news_pipeline import FEEDS, HttpNewsUpstream, NewsPipeline, NewsStore, StubNewsUpstream
+from loan_math import loan_eligibility, loan_eligibility_batch, loan_eligibility_exact
+from loan_products import ProductTable, parse_products
+from loan_sensitivity import MAX_GRID_CELLS, floating_rate_paths, sensitivity_grid
 
 # Initialize FastAPI
 app = FastAPI(title="Banking Assistant API")
@@ -20,29 +44,105 @@ app.add_middleware(
     allow_headers=["*"],
 )  # ✅ Fixed: Added closing parenthesis
 
-# Session storage (in-memory for now)
-session_context: Dict[str, Dict] = {}
+# gzip/brotli for JSON responses (streams and precompressed bodies pass through)
+app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+# Session storage: in memory, persisted to SESSION_DIR as a snapshot plus an
+# append-only log (flushed every SESSION_FLUSH_SECONDS off the request path)
+# so users mid-flow survive restarts and deploys.
+SESSION_DIR = os.environ.get("SESSION_DIR", "./sessions")
+session_context = SessionStore(SESSION_DIR)
+session_context.restore()
+print(f"♻️ Restored {session_context.restored:,} session records in "
+      f"{session_context.restore_seconds * 1000:.1f} ms")
+
+@app.on_event("startup")
+async def start_session_flush():
+    session_context.start(interval=float(os.environ.get("SESSION_FLUSH_SECONDS", 1.0)))
+
+@app.on_event("shutdown")
+async def stop_session_flush():
+    await session_context.stop()
+
+# ============================================
+# RATE LIMITING
+# ============================================
+# Token buckets per session and per client IP, plus a global cap on
+# concurrent model inference. Set RATE_LIMIT_REDIS_URL to share buckets
+# across workers; otherwise they live in a bounded in-process LRU.
+RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL")
+rate_limit_backend = (RedisBuckets.from_url(RATE_LIMIT_REDIS_URL) if RATE_LIMIT_REDIS_URL
+                      else LocalBuckets(max_keys=100_000))
+
+session_limiter = RateLimiter("session", rate=1.0, burst=5, backend=rate_limit_backend)
+ip_limiter = RateLimiter("ip", rate=5.0, burst=20, backend=rate_limit_backend)
+inference_slots = ConcurrencyLimit(int(os.environ.get("MAX_CONCURRENT_INFERENCE", 4)))
+
+# ============================================
+# PROFILING (off by default)
+# ============================================
+# PROFILING_ENABLED=1 (or POST /admin/profiling) lets a /chat request carry
+# "X-Profile: cprofile|torch|all" - honoured only alongside a valid
+# X-Admin-Token. PROFILE_SAMPLE_HZ starts the continuous stack sampler,
+# which writes collapsed stacks for flame graphs.
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "./profiles")
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+def is_admin(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN and token and hmac.compare_digest(token, ADMIN_TOKEN))
+
+request_profiler = RequestProfiler(PROFILE_DIR, enabled=os.environ.get("PROFILING_ENABLED") == "1")
+stack_sampler = StackSampler(os.path.join(PROFILE_DIR, "stacks.collapsed"),
+                             hz=float(os.environ.get("PROFILE_SAMPLE_HZ") or 10))
+if os.environ.get("PROFILE_SAMPLE_HZ"):
+    stack_sampler.start()
 
 # ============================================
 # LOAD MODEL AND LABEL ENCODER
 # ============================================
 print("🔄 Loading model and tokenizer...")
 
-MODEL_PATH = "./model"
+# MODEL_PATH can point at a versioned artifact from retrain.py (models/intent-vN)
+MODEL_PATH = os.environ.get("MODEL_PATH", "./model")
 DATASET_PATH = "./intent_dataset.csv"
 
+# Torch threading / batching tuned for this host by autotune.py. Inter-op
+# threads can only be set before torch starts working, so they apply here.
+# AUTOTUNE=startup runs the benchmark before serving if this host (and
+# model) has no saved result yet.
+AUTOTUNE_PATH = os.environ.get("AUTOTUNE_PATH", "./autotune.json")
+AUTOTUNE_P99_MS = float(os.environ.get("AUTOTUNE_P99_MS", 100))
+
+inference_tuning = load_tuning(AUTOTUNE_PATH, MODEL_PATH)
+if inference_tuning is None and os.environ.get("AUTOTUNE") == "startup":
+    print("⏱️ Autotuning inference for this host...")
+    inference_tuning = autotune(MODEL_PATH, DATASET_PATH, AUTOTUNE_PATH, AUTOTUNE_P99_MS)
+if inference_tuning is not None:
+    try:
+        torch.set_num_interop_threads(inference_tuning['config']['inter_op_threads'])
+    except RuntimeError as e:
+        print(f"⚠️ Could not set inter-op threads: {e}")
+
+def load_label_encoder(model_path: str) -> LabelEncoder:
+    """Retrained artifacts carry their label order; otherwise regenerate from dataset"""
+    encoder = LabelEncoder()
+    labels_path = os.path.join(model_path, "labels.json")
+    if os.path.exists(labels_path):
+        with open(labels_path) as f:
+            encoder.classes_ = np.array(json.load(f), dtype=object)
+    else:
+        df = pd.read_csv(DATASET_PATH)
+        encoder.fit(df['sub_intent'])
+    return encoder
+
 try:
     # Load tokenizer and model
     tokenizer = DistilBertTokenizerFast.from_pretrained(MODEL_PATH)
     model = DistilBertForSequenceClassification.from_pretrained(MODEL_PATH)
     model.eval()
+    label_encoder = load_label_encoder(MODEL_PATH)
     
-    # Regenerate label encoder from dataset
-    df = pd.read_csv(DATASET_PATH)
-    label_encoder = LabelEncoder()
-    label_encoder.fit(df['sub_intent'])
-    
-    print("✅ Model and label encoder loaded successfully!")
+    print(f"✅ Model and label encoder loaded successfully from {MODEL_PATH}!")
     print(f"📊 Labels: {label_encoder.classes_}")
     
 except Exception as e:
@@ -52,22 +152,100 @@ except Exception as e:
 # ============================================
 # INTENT PREDICTION
 # ============================================
-def predict_intent(text: str) -> str:
-    """Predicts intent from user input"""
-    inputs = tokenizer(text, 
+def predict_intents(texts: List[str]) -> List[str]:
+    """Predicts intents for a batch of user inputs in one forward pass"""
+    inputs = tokenizer(texts, 
                       return_tensors="pt", 
                       truncation=True, 
                       padding=True, 
                       max_length=32)
     
-    with torch.no_grad():
+    with torch.no_grad(), request_profiler.torch_ops():
         outputs = model(**inputs)
         logits = outputs.logits
         
-    predicted_class = torch.argmax(logits, dim=1).item()
-    intent = label_encoder.inverse_transform([predicted_class])[0]
-    
-    return intent
+    predicted_classes = torch.argmax(logits, dim=1).tolist()
+    return list(label_encoder.inverse_transform(predicted_classes))
+
+def predict_intent(text: str) -> str:
+    """Predicts intent from user input"""
+    batcher = intent_batcher
+    # A profiled request runs its own forward so the profile includes it
+    if batcher is None or request_profiler.capturing():
+        return predict_intents([text])[0]
+    return batcher.submit(text)
+
+# Set by apply_inference_config(); None = one forward pass per request
+intent_batcher: Optional[MicroBatcher] = None
+inference_config: Dict[str, Any] = {
+    'intra_op_threads': torch.get_num_threads(),
+    'inter_op_threads': torch.get_num_interop_threads(),
+    'workers': None,
+    'batch_size': 1
+}
+
+def apply_inference_config(config: Dict[str, Any]) -> None:
+    """Applies tuned threads and batching (inter-op threads only at startup)"""
+    global intent_batcher, inference_slots, inference_config
+    torch.set_num_threads(config['intra_op_threads'])
+    previous = intent_batcher
+    intent_batcher = MicroBatcher(predict_intents, config['workers'],
+                                  config['batch_size'], config['max_wait_ms'])
+    # Admit enough concurrent requests to fill the batches
+    capacity = config['workers'] * config['batch_size']
+    if capacity > inference_slots.limit:
+        inference_slots = ConcurrencyLimit(capacity)
+    if previous is not None:
+        previous.close()
+    inference_config = {**config, 'inter_op_threads': torch.get_num_interop_threads()}
+    print(f"⚙️ Inference config: {inference_config}")
+
+if inference_tuning is not None:
+    apply_inference_config(inference_tuning['config'])
+
+# ============================================
+# SHADOW MODEL (off by default)
+# ============================================
+# CANDIDATE_MODEL_PATH loads a second model that is run on SHADOW_SAMPLE_RATE
+# of live queries in a background thread, after the user's answer is ready,
+# and compared with the primary (GET /admin/shadow). CANDIDATE_QUANTIZE=1
+# applies dynamic int8 quantization to it; point CANDIDATE_MODEL_PATH at
+# MODEL_PATH to trial quantizing the current model.
+CANDIDATE_MODEL_PATH = os.environ.get("CANDIDATE_MODEL_PATH")
+
+def load_candidate(path: str, quantize: bool):
+    candidate_tokenizer = DistilBertTokenizerFast.from_pretrained(path)
+    candidate_model = DistilBertForSequenceClassification.from_pretrained(path)
+    candidate_model.eval()
+    if quantize:
+        from torch.ao.quantization import quantize_dynamic
+        candidate_model = quantize_dynamic(candidate_model, {torch.nn.Linear}, dtype=torch.qint8)
+    candidate_labels = load_label_encoder(path)
+
+    def predict_candidate(text: str) -> str:
+        inputs = candidate_tokenizer(text, return_tensors="pt", truncation=True, max_length=32)
+        with torch.no_grad():
+            logits = candidate_model(**inputs).logits
+        return candidate_labels.inverse_transform([int(torch.argmax(logits, dim=1))])[0]
+
+    return predict_candidate
+
+shadow_evaluator: Optional[ShadowEvaluator] = None
+if CANDIDATE_MODEL_PATH:
+    quantize_candidate = os.environ.get("CANDIDATE_QUANTIZE") == "1"
+    shadow_evaluator = ShadowEvaluator(
+        load_candidate(CANDIDATE_MODEL_PATH, quantize_candidate),
+        name=CANDIDATE_MODEL_PATH + (" (int8)" if quantize_candidate else ""),
+        sample_rate=float(os.environ.get("SHADOW_SAMPLE_RATE", 0.1)),
+        max_pending=int(os.environ.get("SHADOW_MAX_PENDING", 32)),
+        budget_ms_per_s=float(os.environ.get("SHADOW_BUDGET_MS_PER_S", 250))
+    )
+    print(f"🕶️ Shadowing {shadow_evaluator.name} on {shadow_evaluator.sample_rate:.0%} of queries")
+
+@app.on_event("shutdown")
+async def stop_shadow():
+    if shadow_evaluator is not None:
+        shadow_evaluator.close()
 
 # ============================================
 # BANK DETECTION
@@ -578,7 +756,10 @@ INTENT_HANDLERS = {
     }
 }
 
-def calculate_loan_eligibility(monthly_income, existing_emi, property_value):
+# Structured bank loan products, parsed once from the eligibility workflows above
+LOAN_PRODUCTS = ProductTable(parse_products(INTENT_HANDLERS['loan_eligibility_check']))
+
+def calculate_loan_eligibility(monthly_income, existing_emi, property_value, exact=False):
     """
     Calculate home loan eligibility based on income and obligations
     
@@ -587,99 +768,28 @@ def calculate_loan_eligibility(monthly_income, existing_emi, property_value):
     - Interest Rate: 8.5% p.a. (typical home loan rate)
     - Tenure: 20 years (240 months)
     - LTV (Loan to Value): 80% of property value (max)
-    """
-    
-    # Constants
-    FOIR = 0.50  # 50% - industry standard
-    INTEREST_RATE_ANNUAL = 8.5
-    INTEREST_RATE_MONTHLY = INTEREST_RATE_ANNUAL / 12 / 100
-    TENURE_MONTHS = 240  # 20 years
-    LTV_RATIO = 0.80  # 80% of property value
-    
-    # Step 1: Calculate maximum affordable EMI
-    max_total_emi = monthly_income * FOIR
-    max_new_emi = max_total_emi - existing_emi
-    
-    # Ensure non-negative
-    if max_new_emi < 0:
-        max_new_emi = 0
-    
-    # Step 2: Calculate loan amount from EMI using loan formula
-    # EMI = [P × r × (1+r)^n] / [(1+r)^n - 1]
-    # Rearranging: P = EMI × [(1+r)^n - 1] / [r × (1+r)^n]
-    
-    if max_new_emi > 0 and INTEREST_RATE_MONTHLY > 0:
-        r = INTEREST_RATE_MONTHLY
-        n = TENURE_MONTHS
-        
-        numerator = (1 + r) ** n - 1
-        denominator = r * (1 + r) ** n
-        
-        eligible_loan_amount = max_new_emi * (numerator / denominator)
-    else:
-        eligible_loan_amount = 0
     
-    # Step 3: Apply LTV cap (max 80% of property value)
-    max_loan_by_ltv = property_value * LTV_RATIO
-    eligible_loan_amount = min(eligible_loan_amount, max_loan_by_ltv)
-    
-    # Step 4: Calculate actual EMI for the eligible loan
-    if eligible_loan_amount > 0 and INTEREST_RATE_MONTHLY > 0:
-        P = eligible_loan_amount
-        r = INTEREST_RATE_MONTHLY
-        n = TENURE_MONTHS
-        
-        monthly_emi = (P * r * (1 + r) ** n) / ((1 + r) ** n - 1)
-    else:
-        monthly_emi = 0
-    
-    # Step 5: Calculate metrics
-    total_obligation = existing_emi + monthly_emi
-    debt_to_income_ratio = (total_obligation / monthly_income * 100) if monthly_income > 0 else 0
-    
-    # Step 6: Generate recommendation
-    if debt_to_income_ratio <= 40:
-        recommendation = "Excellent"
-        message = "Low Risk"
-    elif debt_to_income_ratio <= 50:
-        recommendation = "Good"
-        message = "Moderate Risk"
-    elif debt_to_income_ratio <= 60:
-        recommendation = "Moderate"
-        message = "Higher Risk"
-    else:
-        recommendation = "High Risk"
-        message = "Caution Advised"
-    
-    return {
-        'eligible_loan_amount': round(eligible_loan_amount, 2),
-        'monthly_emi': round(monthly_emi, 2),
-        'total_monthly_obligation': round(total_obligation, 2),
-        'debt_to_income_ratio': round(debt_to_income_ratio, 2),
-        'recommendation': f"{recommendation} - {message}",
-        'max_ltv_amount': round(max_loan_by_ltv, 2),
-        'interest_rate': INTEREST_RATE_ANNUAL,
-        'tenure_years': TENURE_MONTHS // 12
-    }
-
-
-
-
-
-
+    exact=True computes in paise with Decimal and returns Decimal amounts.
+    """
+    if exact:
+        return loan_eligibility_exact(monthly_income, existing_emi, property_value)
+    return loan_eligibility(monthly_income, existing_emi, property_value)
 
 
 # ============================================
 # MAIN HANDLER FUNCTION
 # ============================================
-def handle_user_query(user_input: str) -> Dict[str, Any]:
+def handle_user_query(user_input: str, turn: Optional[Turn] = None) -> Dict[str, Any]:
     """Complete workflow: Intent + Bank + Response"""
     
-    # Predict intent
+    # Predict intent (the shadow candidate, if any, runs later in the background)
+    started = time.perf_counter()
     predicted_intent = predict_intent(user_input)
+    if shadow_evaluator is not None:
+        shadow_evaluator.offer(user_input, predicted_intent, (time.perf_counter() - started) * 1000)
     
-    # Detect bank
-    bank = detect_bank(user_input)
+    # Detect bank (reuse the turn's detection if we already have one)
+    bank = turn.bank if turn is not None else detect_bank(user_input)
     
     # Build response
     response = {
@@ -702,8 +812,7 @@ def handle_user_query(user_input: str) -> Dict[str, Any]:
             }
         # Bank-specific intent
         elif bank and bank in intent_data:
-            response['response'] = intent_data[bank]
-            response['response']['type'] = 'workflow'
+            response['response'] = dict(intent_data[bank], type='workflow')
         else:
             # Ask which bank
             response['response'] = {
@@ -720,6 +829,245 @@ def handle_user_query(user_input: str) -> Dict[str, Any]:
     return response
 
 
+# ============================================
+# CONVERSATION RESPONSES
+# ============================================
+LOAN_INTENT = 'loan_eligibility_check'
+LOAN_OPTION_VALUES = frozenset({'docs', 'steps'})
+
+LOAN_OPTIONS = [
+    {'label': '🧮 Calculate your loan eligibility', 'value': 'calculate'},
+    {'label': '📄 Show required documents', 'value': 'docs'},
+    {'label': '📋 Provide application steps', 'value': 'steps'}
+]
+
+LOAN_DOCS_MESSAGE = (
+    "📄 **Required Documents for {bank} Home Loan:**\n\n"
+    "**Identity Proof:**\n"
+    "• PAN Card (mandatory)\n"
+    "• Aadhaar Card\n"
+    "• Passport/Voter ID/Driving License\n\n"
+    "**Address Proof:**\n"
+    "• Aadhaar Card\n"
+    "• Utility bills (electricity/water)\n"
+    "• Passport\n\n"
+    "**Income Proof:**\n"
+    "• Last 6 months' salary slips\n"
+    "• Last 2 years' ITR with computation\n"
+    "• Form 16\n"
+    "• Bank statements (6 months)\n\n"
+    "**Property Documents:**\n"
+    "• Sale deed/Agreement to sell\n"
+    "• Approved building plan\n"
+    "• NOC from builder\n"
+    "• Encumbrance certificate\n\n"
+    "**Additional:**\n"
+    "• Passport size photographs\n"
+    "• Processing fee cheque"
+)
+
+LOAN_STEPS_MESSAGE = (
+    "📋 **{bank} Home Loan Application Steps:**\n\n"
+    "**Step 1: Check Eligibility** ✅\n"
+    "Use the loan calculator to verify your eligibility based on income, credit score, and EMI capacity.\n\n"
+    "**Step 2: Prepare Documents** 📄\n"
+    "Gather all required documents (identity, income, property papers).\n\n"
+    "**Step 3: Apply Online/Offline** 💻\n"
+    "• Online: Visit {bank} website → Home Loans → Apply Now\n"
+    "• Offline: Visit nearest {bank} branch\n\n"
+    "**Step 4: Property Evaluation** 🏠\n"
+    "Bank will conduct technical and legal evaluation of the property.\n\n"
+    "**Step 5: Loan Approval** ✅\n"
+    "Based on documents and property evaluation, loan will be sanctioned.\n\n"
+    "**Step 6: Disbursement** 💰\n"
+    "After signing the loan agreement, funds will be disbursed as per payment schedule.\n\n"
+    "**Timeline:** Typically 7-15 working days from application to disbursement."
+)
+
+LOAN_OPTION_RESPONSES = {
+    'docs': ('loan_documents', LOAN_DOCS_MESSAGE),
+    'steps': ('loan_application_steps', LOAN_STEPS_MESSAGE),
+}
+
+CALCULATOR_PROMPT_MESSAGE = (
+    "Let's calculate your eligibility! 🧮\n\n"
+    "Please provide the following separated by commas:\n\n"
+    "1️⃣ Your monthly income (₹)\n"
+    "2️⃣ Existing monthly EMIs (₹)\n"
+    "3️⃣ Property value (₹)\n\n"
+    "**Example:** 80000, 15000, 5000000"
+)
+
+CALCULATOR_ERROR_MESSAGE = (
+    "❌ Please enter exactly 3 numbers separated by commas:\n\n"
+    "Format: income, existing_emi, property_value\n"
+    "Example: 80000, 15000, 5000000"
+)
+
+
+def workflow_response(intent: str, bank: str) -> Dict[str, Any]:
+    """Bank workflow body, with the loan option buttons where a calculator exists"""
+    handler = INTENT_HANDLERS[intent][bank]
+    body = dict(handler, type='workflow')
+    if intent == LOAN_INTENT and handler.get('calculator_available'):
+        body['options'] = LOAN_OPTIONS
+    return body
+
+
+def session_for(intent: str, bank: Optional[str], original_query: str) -> SessionState:
+    """Builds the session record for an intent that is waiting on the user"""
+    if not bank:
+        state = DialogState.AWAITING_BANK
+    elif intent == LOAN_INTENT:
+        state = DialogState.LOAN_OPTIONS
+    else:
+        state = DialogState.BANK_SELECTED
+    return SessionState(state, intent, bank, original_query)
+
+
+# ============================================
+# CONVERSATION STATE MACHINE
+# ============================================
+def on_calculator_input(turn: Turn, session: SessionState):
+    """Parses 'income, existing_emi, property_value' and runs the calculator"""
+    try:
+        # Parse comma-separated numbers
+        values = [int(val.strip()) for val in turn.text.split(',')]
+        if len(values) != 3:
+            raise ValueError("Need exactly 3 values")
+    except ValueError:
+        # Keep waiting for valid input
+        return {
+            'user_query': turn.text,
+            'detected_intent': 'error',
+            'detected_bank': None,
+            'response': {
+                'type': 'error',
+                'message': CALCULATOR_ERROR_MESSAGE
+            }
+        }, session
+    
+    income, existing_emi, property_value = values
+    
+    # Calculate eligibility
+    results = calculate_loan_eligibility(income, existing_emi, property_value)
+    
+    # Format response
+    return {
+        'user_query': turn.text,
+        'detected_intent': 'loan_calculation_result',
+        'detected_bank': session.bank,
+        'response': {
+            'type': 'loan_calculation',
+            'message': f"📊 **Loan Eligibility Results**\n\n"
+                      f"💼 Monthly Income: ₹{income:,}\n"
+                      f"💳 Existing EMIs: ₹{existing_emi:,}\n"
+                      f"🏠 Property Value: ₹{property_value:,}\n\n"
+                      f"✅ **Maximum Loan Amount:** ₹{results['eligible_loan_amount']:,}\n"
+                      f"✅ **Monthly EMI @ {results['interest_rate']}%:** ₹{results['monthly_emi']:,}\n"
+                      f"✅ **Total Obligation:** ₹{results['total_monthly_obligation']:,}\n"
+                      f"📈 **Debt-to-Income Ratio:** {results['debt_to_income_ratio']}%\n\n"
+                      f"💡 **Recommendation:** {results['recommendation']}\n\n"
+                      + ("✅ You're eligible! Your debt-to-income ratio is healthy." if results['debt_to_income_ratio'] < 65 else "⚠️ Caution: High debt ratio. Consider reducing EMIs or increasing income."),
+            'calculation_data': results
+        }
+    }, None  # Calculation done - clear context
+
+
+def on_loan_option(turn: Turn, session: SessionState):
+    """'docs' / 'steps' option buttons"""
+    detected_intent, template = LOAN_OPTION_RESPONSES[turn.lower]
+    return {
+        'user_query': turn.text,
+        'detected_intent': detected_intent,
+        'detected_bank': session.bank,
+        'response': {
+            'type': 'info',
+            'message': template.format(bank=session.bank)
+        }
+    }, session
+
+
+def on_calculate(turn: Turn, session: SessionState):
+    """Prompts for calculator input"""
+    return {
+        'user_query': turn.text,
+        'detected_intent': 'loan_calculator_prompt',
+        'detected_bank': session.bank,
+        'response': {
+            'type': 'calculator_prompt',
+            'message': CALCULATOR_PROMPT_MESSAGE
+        }
+    }, SessionState(DialogState.AWAITING_CALCULATION, session.intent, session.bank, session.original_query)
+
+
+def on_bank_reply(turn: Turn, session: SessionState):
+    """User named a bank for the intent we are holding"""
+    detected_bank = turn.bank
+    stored_intent = session.intent
+    intent_data = INTENT_HANDLERS[stored_intent]
+    
+    response = {
+        'user_query': turn.text,
+        'detected_intent': stored_intent,
+        'detected_bank': detected_bank,
+        'response': None
+    }
+    
+    if detected_bank not in intent_data:
+        response['response'] = {
+            'message': f"Sorry, I don't have information for {detected_bank} regarding {stored_intent.replace('_', ' ')}.",
+            'type': 'not_found'
+        }
+        return response, None
+    
+    response['response'] = workflow_response(stored_intent, detected_bank)
+    
+    # Keep the session (with the bank) for a potential "calculate" trigger
+    return response, session_for(stored_intent, detected_bank, session.original_query)
+
+
+def on_free_text(turn: Turn, session: SessionState):
+    """Anything the current state can't resolve: run the model"""
+    with inference_slots.slot():
+        result = handle_user_query(turn.text, turn)
+    detected_intent = result['detected_intent']
+    
+    # Store context if we are waiting on a bank, or for loan follow-ups
+    if result['response'].get('type') == 'bank_selection':
+        return result, session_for(detected_intent, None, turn.text)
+    if detected_intent == LOAN_INTENT and result['detected_bank']:
+        return result, session_for(detected_intent, result['detected_bank'], turn.text)
+    
+    return result, (session if session.state != DialogState.IDLE else None)
+
+
+def _always(turn: Turn, session: SessionState) -> bool:
+    return True
+
+def _is_loan_option(turn: Turn, session: SessionState) -> bool:
+    return turn.lower in LOAN_OPTION_VALUES
+
+def _is_calculate(turn: Turn, session: SessionState) -> bool:
+    return session.intent == LOAN_INTENT and 'calculate' in turn.lower
+
+def _names_bank(turn: Turn, session: SessionState) -> bool:
+    return turn.bank is not None
+
+
+dialog = DialogMachine(fallback=on_free_text)
+dialog.on(DialogState.AWAITING_CALCULATION, _always, on_calculator_input)
+dialog.on(DialogState.LOAN_OPTIONS, _is_loan_option, on_loan_option)
+dialog.on(DialogState.LOAN_OPTIONS, _is_calculate, on_calculate)
+dialog.on(DialogState.LOAN_OPTIONS, _names_bank, on_bank_reply)
+dialog.on(DialogState.AWAITING_BANK, _is_calculate, on_calculate)
+dialog.on(DialogState.AWAITING_BANK, _names_bank, on_bank_reply)
+dialog.on(DialogState.BANK_SELECTED, _names_bank, on_bank_reply)
+dialog.compile()
+
+IDLE_SESSION = SessionState()
+
+
 # ============================================
 # REQUEST/RESPONSE MODELS
 # ============================================
@@ -744,236 +1092,520 @@ def read_root():
         "version": "1.0"
     }
 
+def check_rate_limits(session_id: str, client_ip: str) -> None:
+    # IP first, so calls rejected there don't spend the session's budget
+    ip_limiter.check(client_ip)
+    session_limiter.check(session_id)
+
+def client_ip(connection) -> str:
+    return connection.client.host if connection.client else "unknown"
+
+def rate_limited_error(e: RateLimited) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=str(e),
+                         headers={"Retry-After": e.retry_after_header})
+
+def store_session(session_id: str, session: SessionState, next_session: Optional[SessionState]) -> None:
+    """Writes the post-turn session back to the store"""
+    if next_session is None:
+        session_context.pop(session_id, None)
+    elif next_session is not session:
+        session_context[session_id] = next_session
+
 @app.post("/chat", response_model=ChatResponse)
-def chat_endpoint(request: ChatRequest):
+def chat_endpoint(request: ChatRequest, http_request: Request, http_response: Response,
+                  x_profile: Optional[str] = Header(None), x_admin_token: Optional[str] = Header(None)):
     """Main chat endpoint with session context support"""
     try:
         session_id = request.session_id
-        user_input = request.user_input.strip()
-        
-        # Check if session has pending context
-        if session_id in session_context:
-            context = session_context[session_id]
-            
-            # ============================================
-            # HANDLE LOAN CALCULATOR INPUT
-            # ============================================
-            if context.get('pending_action') == 'awaiting_loan_calculation':
-                try:
-                    # Parse comma-separated numbers
-                    values = [int(val.strip()) for val in user_input.split(',')]
-                    if len(values) != 3:
-                        raise ValueError("Need exactly 3 values")
-                    
-                    income, existing_emi, property_value = values
-                    
-                    # Calculate eligibility
-                    results = calculate_loan_eligibility(income, existing_emi, property_value)
-                    
-                    # Format response
-                    response = {
-                        'user_query': user_input,
-                        'detected_intent': 'loan_calculation_result',
-                        'detected_bank': context.get('bank'),
-                        'response': {
-                            'type': 'loan_calculation',
-                            'message': f"📊 **Loan Eligibility Results**\n\n"
-                                      f"💼 Monthly Income: ₹{income:,}\n"
-                                      f"💳 Existing EMIs: ₹{existing_emi:,}\n"
-                                      f"🏠 Property Value: ₹{property_value:,}\n\n"
-                                      f"✅ **Maximum Loan Amount:** ₹{results['eligible_loan_amount']:,}\n"
-                                      f"✅ **Monthly EMI @ 8.5%:** ₹{results['monthly_emi']:,}\n"
-                                      f"✅ **Total Obligation:** ₹{results['total_monthly_obligation']:,}\n"
-                                      f"📈 **Debt-to-Income Ratio:** {results['debt_to_income_ratio']}%\n\n"
-                                      f"💡 **Recommendation:** {results['recommendation']}\n\n"
-                                      + ("✅ You're eligible! Your debt-to-income ratio is healthy." if results['debt_to_income_ratio'] < 65 else "⚠️ Caution: High debt ratio. Consider reducing EMIs or increasing income."),
-                            'calculation_data': results
-                        }
-                    }
-                    
-                    # Clear context
-                    del session_context[session_id]
-                    return response
-                    
-                except ValueError:
-                    return {
-                        'user_query': user_input,
-                        'detected_intent': 'error',
-                        'detected_bank': None,
-                        'response': {
-                            'type': 'error',
-                            'message': "❌ Please enter exactly 3 numbers separated by commas:\n\n"
-                                      "Format: income, existing_emi, property_value\n"
-                                      "Example: 80000, 15000, 5000000"
-                        }
-                    }
-            
-            # ============================================
-            # HANDLE "DOCS" AND "STEPS" BUTTONS
-            # ============================================
-            if user_input.lower() in ['docs', 'steps']:
-                stored_intent = context.get('detected_intent')
-                stored_bank = context.get('detected_bank')
-                
-                if stored_intent == 'loan_eligibility_check' and stored_bank:
-                    if user_input.lower() == 'docs':
-                        # Required documents response
-                        return {
-                            'user_query': user_input,
-                            'detected_intent': 'loan_documents',
-                            'detected_bank': stored_bank,
-                            'response': {
-                                'type': 'info',
-                                'message': f"📄 **Required Documents for {stored_bank} Home Loan:**\n\n"
-                                          f"**Identity Proof:**\n"
-                                          f"• PAN Card (mandatory)\n"
-                                          f"• Aadhaar Card\n"
-                                          f"• Passport/Voter ID/Driving License\n\n"
-                                          f"**Address Proof:**\n"
-                                          f"• Aadhaar Card\n"
-                                          f"• Utility bills (electricity/water)\n"
-                                          f"• Passport\n\n"
-                                          f"**Income Proof:**\n"
-                                          f"• Last 6 months' salary slips\n"
-                                          f"• Last 2 years' ITR with computation\n"
-                                          f"• Form 16\n"
-                                          f"• Bank statements (6 months)\n\n"
-                                          f"**Property Documents:**\n"
-                                          f"• Sale deed/Agreement to sell\n"
-                                          f"• Approved building plan\n"
-                                          f"• NOC from builder\n"
-                                          f"• Encumbrance certificate\n\n"
-                                          f"**Additional:**\n"
-                                          f"• Passport size photographs\n"
-                                          f"• Processing fee cheque"
-                            }
-                        }
-                    
-                    elif user_input.lower() == 'steps':
-                        # Application steps response
-                        return {
-                            'user_query': user_input,
-                            'detected_intent': 'loan_application_steps',
-                            'detected_bank': stored_bank,
-                            'response': {
-                                'type': 'info',
-                                'message': f"📋 **{stored_bank} Home Loan Application Steps:**\n\n"
-                                          f"**Step 1: Check Eligibility** ✅\n"
-                                          f"Use the loan calculator to verify your eligibility based on income, credit score, and EMI capacity.\n\n"
-                                          f"**Step 2: Prepare Documents** 📄\n"
-                                          f"Gather all required documents (identity, income, property papers).\n\n"
-                                          f"**Step 3: Apply Online/Offline** 💻\n"
-                                          f"• Online: Visit {stored_bank} website → Home Loans → Apply Now\n"
-                                          f"• Offline: Visit nearest {stored_bank} branch\n\n"
-                                          f"**Step 4: Property Evaluation** 🏠\n"
-                                          f"Bank will conduct technical and legal evaluation of the property.\n\n"
-                                          f"**Step 5: Loan Approval** ✅\n"
-                                          f"Based on documents and property evaluation, loan will be sanctioned.\n\n"
-                                          f"**Step 6: Disbursement** 💰\n"
-                                          f"After signing the loan agreement, funds will be disbursed as per payment schedule.\n\n"
-                                          f"**Timeline:** Typically 7-15 working days from application to disbursement."
-                            }
-                        }
-            
-            # ============================================
-            # CHECK FOR "CALCULATE" TRIGGER (WITHIN SESSION)
-            # ============================================
-            if 'calculate' in user_input.lower():
-                if context.get('detected_intent') == 'loan_eligibility_check':
-                    # Prompt for calculator input
-                    session_context[session_id]['pending_action'] = 'awaiting_loan_calculation'
-                    session_context[session_id]['bank'] = context.get('detected_bank')
-                    
-                    return {
-                        'user_query': user_input,
-                        'detected_intent': 'loan_calculator_prompt',
-                        'detected_bank': context.get('detected_bank'),
-                        'response': {
-                            'type': 'calculator_prompt',
-                            'message': "Let's calculate your eligibility! 🧮\n\n"
-                                      "Please provide the following separated by commas:\n\n"
-                                      "1️⃣ Your monthly income (₹)\n"
-                                      "2️⃣ Existing monthly EMIs (₹)\n"
-                                      "3️⃣ Property value (₹)\n\n"
-                                      "**Example:** 80000, 15000, 5000000"
-                        }
-                    }
-            
-            # ============================================
-            # HANDLE BANK SELECTION
-            # ============================================
-            detected_bank = detect_bank(user_input)
-            if detected_bank:
-                stored_intent = context.get('detected_intent')
-                
-                response = {
-                    'user_query': user_input,
-                    'detected_intent': stored_intent,
-                    'detected_bank': detected_bank,
-                    'response': None
-                }
-                
-                if stored_intent in INTENT_HANDLERS:
-                    intent_data = INTENT_HANDLERS[stored_intent]
-                    
-                    if detected_bank in intent_data:
-                        response['response'] = intent_data[detected_bank]
-                        response['response']['type'] = 'workflow'
-                        
-                        # If loan eligibility with calculator, add options
-                        if stored_intent == 'loan_eligibility_check' and intent_data[detected_bank].get('calculator_available'):
-                            response['response']['options'] = [
-                                {'label': '🧮 Calculate your loan eligibility', 'value': 'calculate'},
-                                {'label': '📄 Show required documents', 'value': 'docs'},
-                                {'label': '📋 Provide application steps', 'value': 'steps'}
-                            ]
-                        
-                        # Update session with bank for potential calculator use
-                        session_context[session_id]['detected_bank'] = detected_bank
-                        
-                        # DON'T delete context yet - keep it for "calculate" trigger
-                        return response
-                    else:
-                        response['response'] = {
-                            'message': f"Sorry, I don't have information for {detected_bank} regarding {stored_intent.replace('_', ' ')}.",
-                            'type': 'not_found'
-                        }
-                        del session_context[session_id]
-                        return response
-        
-        # ============================================
-        # NORMAL QUERY PROCESSING
-        # ============================================
-        result = handle_user_query(user_input)
+        check_rate_limits(session_id, client_ip(http_request))
+        turn = Turn(request.user_input.strip(), detect_bank)
+        session = session_context.get(session_id, IDLE_SESSION)
         
-        # If response asks for bank, store context
-        if result.get('response', {}).get('type') == 'bank_selection':
-            session_context[session_id] = {
-                'original_query': user_input,
-                'detected_intent': result['detected_intent']
-            }
+        with request_profiler.capture(x_profile if is_admin(x_admin_token) else None) as profile_id:
+            response, next_session = dialog.dispatch(turn, session)
+        store_session(session_id, session, next_session)
         
-        # If it's loan_eligibility_check with bank already detected, keep session
-        if result.get('detected_intent') == 'loan_eligibility_check' and result.get('detected_bank'):
-            session_context[session_id] = {
-                'original_query': user_input,
-                'detected_intent': result['detected_intent'],
-                'detected_bank': result['detected_bank']
-            }
+        if profile_id:
+            http_response.headers['X-Profile-Id'] = profile_id
         
-        return result
+        return response
         
+    except RateLimited as e:
+        raise rate_limited_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ============================================
+# STREAMING CHAT TRANSPORT
+# ============================================
+def response_sections(result: Dict[str, Any]):
+    """
+    Splits a chat response into the sections sent over a stream:
+    the message first, then one frame per workflow, then the extras
+    (bank buttons, options, calculator data), then 'done'.
+    """
+    body = result.get('response') or {}
+    
+    yield 'message', {
+        'user_query': result['user_query'],
+        'detected_intent': result['detected_intent'],
+        'detected_bank': result['detected_bank'],
+        'type': body.get('type'),
+        'message': body.get('message')
+    }
+    for workflow in body.get('workflows', ()):
+        yield 'workflow', workflow
+    for key in ('available_banks', 'options', 'calculation_data'):
+        if key in body:
+            yield key, body[key]
+    yield 'done', {}
 
 
+def sse_frame(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def limited_dispatch(session_id: str, ip: str, turn: Turn, session: SessionState):
+    check_rate_limits(session_id, ip)
+    return dialog.dispatch(turn, session)
+
+@app.websocket("/ws/chat/{session_id}")
+async def chat_socket(websocket: WebSocket, session_id: str):
+    """
+    Persistent chat connection. Each turn reads the session from the store
+    and writes its result back, as /chat does, so turns sent over /chat or
+    SSE in between are seen and a restart mid-flow loses nothing.
+    Client sends {"user_input": "..."}; server replies with
+    {"event": ..., "data": ...} frames from response_sections().
+    """
+    await websocket.accept()
+    ip = client_ip(websocket)
+    
+    try:
+        while True:
+            try:
+                payload = json.loads(await websocket.receive_text())
+                if not isinstance(payload, dict):
+                    raise ValueError("expected a JSON object")
+            except KeyError:
+                await websocket.send_json({'event': 'error', 'data': {'detail': "Invalid message: expected a text frame"}})
+                continue
+            except ValueError as e:
+                await websocket.send_json({'event': 'error', 'data': {'detail': f"Invalid message: {e}"}})
+                continue
+            turn = Turn(str(payload.get('user_input', '')).strip(), detect_bank)
+            session = session_context.get(session_id, IDLE_SESSION)
+            
+            try:
+                # Rate limits (a Redis round trip when shared) and model
+                # inference are blocking - keep them off the event loop
+                response, next_session = await run_in_threadpool(limited_dispatch, session_id, ip, turn, session)
+            except RateLimited as e:
+                await websocket.send_json({'event': 'error',
+                                           'data': {'detail': str(e), 'retry_after': e.retry_after}})
+                continue
+            except Exception as e:
+                await websocket.send_json({'event': 'error', 'data': {'detail': str(e)}})
+                continue
+            
+            store_session(session_id, session, next_session)
+            for event, data in response_sections(response):
+                await websocket.send_json({'event': event, 'data': data})
+    
+    except WebSocketDisconnect:
+        pass
+
+
+@app.post("/chat/stream")
+def chat_stream(request: ChatRequest, http_request: Request):
+    """Server-Sent Events fallback for clients that can't open a WebSocket"""
+    session_id = request.session_id
+    turn = Turn(request.user_input.strip(), detect_bank)
+    session = session_context.get(session_id, IDLE_SESSION)
+    
+    try:
+        check_rate_limits(session_id, client_ip(http_request))
+        response, next_session = dialog.dispatch(turn, session)
+    except RateLimited as e:
+        raise rate_limited_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    store_session(session_id, session, next_session)
+    
+    frames = (sse_frame(event, data) for event, data in response_sections(response))
+    return StreamingResponse(frames, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ============================================
+# STATIC CATALOG ENDPOINTS
+# ============================================
+# Workflows and loan docs/steps never change while the server runs, so they
+# are serialized, compressed and hashed once here and served with strong
+# ETags - the frontend/CDN can cache them and skip the chat round trip.
+CATALOG_CACHE_CONTROL = "public, max-age=3600, stale-while-revalidate=86400"
+
+def build_catalog() -> Dict[Tuple[str, str], CatalogEntry]:
+    catalog = {}
+    for intent, intent_data in INTENT_HANDLERS.items():
+        if 'type' in intent_data:
+            continue  # info-only intent, nothing bank-specific
+        for bank in intent_data:
+            catalog[(intent, bank)] = build_entry(workflow_response(intent, bank))
+            if intent == LOAN_INTENT:
+                for option_intent, template in LOAN_OPTION_RESPONSES.values():
+                    catalog[(option_intent, bank)] = build_entry({
+                        'type': 'info',
+                        'message': template.format(bank=bank)
+                    })
+    return catalog
+
+CATALOG = build_catalog()
+
+catalog_banks: Dict[str, List[str]] = {}
+for intent, bank in CATALOG:
+    catalog_banks.setdefault(intent, []).append(bank)
+CATALOG_INDEX = build_entry(catalog_banks)
+
+
+def catalog_response(entry: CatalogEntry, request: Request) -> Response:
+    """Serves a precompressed catalog body, or 304 if the client's copy is current"""
+    encoding = choose_encoding(request.headers.get('accept-encoding'))
+    body, etag, content_encoding = entry.representation(encoding)
+    headers = {
+        'ETag': etag,
+        'Cache-Control': CATALOG_CACHE_CONTROL,
+        'Vary': 'Accept-Encoding'
+    }
+    
+    if entry.matches(request.headers.get('if-none-match')):
+        return Response(status_code=304, headers=headers)
+    
+    if content_encoding:
+        headers['Content-Encoding'] = content_encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/catalog")
+def catalog_index(request: Request):
+    """Intent -> banks with a catalog entry"""
+    return catalog_response(CATALOG_INDEX, request)
+
+@app.get("/catalog/{intent}/{bank}")
+def catalog_entry(intent: str, bank: str, request: Request):
+    entry = CATALOG.get((intent, bank))
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"No catalog entry for {intent} / {bank}")
+    return catalog_response(entry, request)
+
+
+
+# ============================================
+# MARKET DATA
+# ============================================
+# One shared snapshot for every dashboard: upstream calls happen once per
+# TTL no matter how many browsers poll. MARKET_UPSTREAM=stub avoids the
+# network (tests / offline dev).
+if os.environ.get("MARKET_UPSTREAM") == "stub":
+    market_upstream = StubMarketUpstream()
+else:
+    market_upstream = create_http_upstream(os.environ.get("FINNHUB_API_KEY", ""))
+    if not market_upstream.finnhub_key:
+        print("⚠️ FINNHUB_API_KEY is not set: stock quotes fall back to sample data and global/crypto/merger news will stay empty")
+
+market_service = MarketDataService(market_upstream, SWRCache(ttl=60, stale_ttl=240))
+
+@app.on_event("shutdown")
+async def close_market_client():
+    client = getattr(market_upstream, 'client', None)
+    if client is not None:
+        await client.aclose()
+
+@app.get("/market/snapshot")
+async def market_snapshot(response: Response):
+    """Indices, trending stocks, gainers/losers and INR rates"""
+    snapshot = await market_service.snapshot()
+    response.headers["Cache-Control"] = "public, max-age=30"
+    return snapshot
+
+
+# ============================================
+# CHART SERIES
+# ============================================
+# Candles are kept server-side per (symbol, resolution) and downsampled
+# with LTTB to the width the client will actually draw.
+if isinstance(market_upstream, StubMarketUpstream):
+    chart_store = ChartStore(StubCandles())
+else:
+    chart_store = ChartStore(FinnhubCandles(market_upstream.client, market_upstream.finnhub_key))
+
+@app.get("/chart/{symbol}")
+async def chart_series(symbol: str, response: Response, period: str = "1M", width: int = 25):
+    """Close prices for a period, downsampled to `width` points"""
+    if period not in PERIODS:
+        raise HTTPException(status_code=400, detail=f"period must be one of {', '.join(PERIODS)}")
+    if width < 3:
+        raise HTTPException(status_code=400, detail="width must be at least 3")
+    if not SYMBOL_PATTERN.fullmatch(symbol):
+        raise HTTPException(status_code=400, detail="Invalid symbol")
+    
+    chart = await chart_store.chart(symbol, period, width)
+    if chart is None:
+        raise HTTPException(status_code=404, detail=f"No chart data for {symbol}")
+    
+    response.headers["Cache-Control"] = "public, max-age=60"
+    return chart
+
+
+# ============================================
+# LOAN COMPARISON
+# ============================================
+class LoanComparisonRequest(BaseModel):
+    monthly_income: float = Field(..., gt=0)
+    existing_emi: float = Field(0, ge=0)
+    age: int = Field(..., gt=0)
+    credit_score: int = Field(..., ge=300, le=900)
+    experience_years: float = Field(0, ge=0)
+    property_value: Optional[float] = Field(None, gt=0)   # caps home loans at 80% LTV
+    loan_amount: Optional[float] = Field(None, gt=0)      # default: max eligible amount
+    tenure_years: Optional[int] = Field(None, gt=0, le=40)  # default: 20 home / 5 personal
+
+@app.post("/loan/compare")
+def compare_loans(request: LoanComparisonRequest):
+    """Eligibility and EMI for one applicant across every bank product, best first"""
+    return {
+        'applicant': request.model_dump(),
+        'offers': LOAN_PRODUCTS.compare(**request.model_dump()),
+        # No interest rate listed, so no EMI to compare
+        'not_comparable': [{'bank': p.bank, 'product': p.name, 'link': p.link}
+                           for p in LOAN_PRODUCTS.not_comparable]
+    }
+
+
+class LoanCalculationRequest(BaseModel):
+    monthly_income: float = Field(..., gt=0)
+    existing_emi: float = Field(0, ge=0)
+    property_value: float = Field(..., gt=0)
+    exact: bool = False    # Decimal/paise arithmetic; amounts returned as strings
+
+@app.post("/loan/calculate")
+def loan_calculate(request: LoanCalculationRequest):
+    """Same calculation as the /chat loan calculator"""
+    results = calculate_loan_eligibility(request.monthly_income, request.existing_emi,
+                                         request.property_value, exact=request.exact)
+    if request.exact:
+        results = {k: str(v) if isinstance(v, Decimal) else v for k, v in results.items()}
+    return results
+
+
+class LoanApplicant(BaseModel):
+    monthly_income: float = Field(..., gt=0)
+    existing_emi: float = Field(0, ge=0)
+    property_value: float = Field(..., gt=0)
+
+class LoanBatchRequest(BaseModel):
+    applicants: List[LoanApplicant] = Field(..., min_length=1, max_length=10000)
+
+@app.post("/loan/calculate/batch")
+def loan_calculate_batch(request: LoanBatchRequest):
+    """/loan/calculate for many applicants in one vectorised pass"""
+    columns = loan_eligibility_batch(
+        [a.monthly_income for a in request.applicants],
+        [a.existing_emi for a in request.applicants],
+        [a.property_value for a in request.applicants]
+    )
+    columns = {k: v.tolist() for k, v in columns.items()}
+    return {
+        'results': [
+            {k: column[i] for k, column in columns.items()}
+            for i in range(len(request.applicants))
+        ]
+    }
+
+
+class FloatingRateScenario(BaseModel):
+    loan_amount: float = Field(..., gt=0)
+    base_rate: float = Field(8.5, ge=0, le=30)
+    tenure_years: int = Field(20, gt=0, le=40)
+    paths: int = Field(2000, gt=0, le=20000)
+    annual_volatility_bp: float = Field(75, ge=0, le=2000)   # 20%/yr is already extreme
+    annual_drift_bp: float = Field(0, ge=-1000, le=1000)
+    reset_every_months: int = Field(12, gt=0, le=120)
+    dti_limit: float = Field(50, gt=0)
+    seed: Optional[int] = None
+
+class SensitivityRequest(BaseModel):
+    monthly_income: float = Field(..., gt=0)
+    existing_emi: float = Field(0, ge=0)
+    property_value: float = Field(..., gt=0)
+    interest_rates: List[Annotated[float, Field(ge=0, le=30)]] = [7.5, 8.0, 8.5, 9.0, 9.5, 10.0, 10.5, 11.0]
+    tenures_years: List[Annotated[int, Field(gt=0, le=40)]] = [10, 15, 20, 25, 30]
+    foirs: List[Annotated[float, Field(gt=0, le=1)]] = [0.4, 0.5, 0.6]
+    ltvs: List[Annotated[float, Field(gt=0, le=1)]] = [0.75, 0.8, 0.9]
+    floating: Optional[FloatingRateScenario] = None
+
+@app.post("/loan/sensitivity")
+def loan_sensitivity(request: SensitivityRequest):
+    """Rate-shock / affordability surfaces, optionally with floating-rate simulation"""
+    axes = (request.interest_rates, request.tenures_years, request.foirs, request.ltvs)
+    cells = 1
+    for axis in axes:
+        cells *= len(axis)
+    if cells == 0 or cells > MAX_GRID_CELLS:
+        raise HTTPException(status_code=400, detail=f"Grid must have 1-{MAX_GRID_CELLS:,} cells (got {cells:,})")
+    
+    result = sensitivity_grid(request.monthly_income, request.existing_emi, request.property_value, *axes)
+    
+    if request.floating is not None:
+        result['floating'] = floating_rate_paths(
+            monthly_income=request.monthly_income,
+            existing_emi=request.existing_emi,
+            **request.floating.model_dump()
+        )
+    return result
+
+
+# ============================================
+# NEWS
+# ============================================
+# Feeds are pulled every 5 minutes into a bounded store that cleans HTML
+# and clusters near-duplicate stories once, at ingest.
+if isinstance(market_upstream, StubMarketUpstream):
+    news_upstream = StubNewsUpstream()
+else:
+    news_upstream = HttpNewsUpstream(market_upstream.client,
+                                     market_upstream.finnhub_key,
+                                     os.environ.get("MARKETAUX_API_KEY", ""))
+    if not news_upstream.marketaux_key:
+        print("⚠️ MARKETAUX_API_KEY is not set: india and forex news will stay empty")
+
+news_pipeline = NewsPipeline(news_upstream, NewsStore(max_articles=2000), interval=300)
+
+@app.on_event("startup")
+async def start_news_pipeline():
+    news_pipeline.start()
+
+@app.on_event("shutdown")
+async def stop_news_pipeline():
+    await news_pipeline.stop()
+
+@app.get("/news")
+def news_page(response: Response, category: str = "global", page: int = 1, page_size: int = 15):
+    """Deduplicated news for a category, newest first"""
+    if category not in FEEDS:
+        raise HTTPException(status_code=400, detail=f"category must be one of {', '.join(FEEDS)}")
+    if page < 1 or not 1 <= page_size <= 50:
+        raise HTTPException(status_code=400, detail="page must be >= 1 and page_size 1-50")
+    
+    response.headers["Cache-Control"] = "public, max-age=60"
+    return news_pipeline.store.page(category, page, page_size)
+
+
+# ============================================
+# ADMIN: PROFILING
+# ============================================
+class ProfilingToggle(BaseModel):
+    enabled: Optional[bool] = None    # honour X-Profile on /chat
+    sampling: Optional[bool] = None   # continuous stack sampler
+
+def require_admin(token: Optional[str]) -> None:
+    if not is_admin(token):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+def profiling_status():
+    return {
+        'request_profiling': request_profiler.enabled,
+        'profile_dir': PROFILE_DIR,
+        'recent_profiles': request_profiler.recent(),
+        'sampler': stack_sampler.status()
+    }
+
+@app.get("/admin/profiling")
+def get_profiling(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    return profiling_status()
+
+@app.post("/admin/profiling")
+def set_profiling(toggle: ProfilingToggle, x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    if toggle.enabled is not None:
+        request_profiler.enabled = toggle.enabled
+    if toggle.sampling is True:
+        stack_sampler.start()
+    elif toggle.sampling is False:
+        stack_sampler.stop()
+    return profiling_status()
+
+# Serialized: a second run would benchmark against the first
+autotune_lock = threading.Lock()
+
+def inference_status():
+    return {
+        'config': inference_config,
+        'tuning': inference_tuning,
+        'autotune_running': autotune_lock.locked()
+    }
+
+def run_autotune() -> None:
+    """Runs in a background thread that already holds autotune_lock"""
+    global inference_tuning
+    try:
+        inference_tuning = autotune(MODEL_PATH, DATASET_PATH, AUTOTUNE_PATH, AUTOTUNE_P99_MS)
+        apply_inference_config(inference_tuning['config'])
+    except Exception as e:
+        print(f"⚠️ Autotune failed: {e}")
+    finally:
+        autotune_lock.release()
+
+@app.get("/admin/inference")
+def get_inference(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    return inference_status()
+
+@app.post("/admin/inference/autotune", status_code=202)
+def start_autotune(x_admin_token: Optional[str] = Header(None)):
+    """Benchmarks in child processes; results apply when done (inter-op threads on restart)"""
+    require_admin(x_admin_token)
+    if autotune_lock.acquire(blocking=False):
+        threading.Thread(target=run_autotune, daemon=True, name="autotune").start()
+    return inference_status()
+
+@app.get("/admin/sessions")
+def get_session_store(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    return session_context.stats()
+
 
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "model_loaded": model is not None}
 
+
+# ============================================
+# ADMIN: SHADOW
+# ============================================
+# Inspect or retune the candidate-model comparison (see SHADOW MODEL above)
+class ShadowToggle(BaseModel):
+    sample_rate: Optional[float] = Field(None, ge=0, le=1)
+    reset: bool = False     # clear counters and samples
+
+@app.get("/admin/shadow")
+def get_shadow(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    return shadow_evaluator.stats() if shadow_evaluator is not None else {'candidate': None}
+
+@app.post("/admin/shadow")
+def set_shadow(toggle: ShadowToggle, x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    if shadow_evaluator is None:
+        raise HTTPException(status_code=404, detail="No candidate model (set CANDIDATE_MODEL_PATH)")
+    if toggle.sample_rate is not None:
+        shadow_evaluator.sample_rate = toggle.sample_rate
+    if toggle.reset:
+        shadow_evaluator.reset()
+    return shadow_evaluator.stats()
+
 # ============================================
 # RUN SERVER
 # ============================================
@@ -0,0 +1,274 @@
+"""
+Benchmarks torch threading and intent batching on this host.
+
+    python autotune.py [--p99-ms 100] [--interop 1,2]
+
+Every (intra-op threads, workers, batch size) in the grid is run against
+the real model under a closed-loop load of intent_dataset.csv utterances.
+The highest-throughput setting whose p99 latency meets the target is saved
+to autotune.json under this host's fingerprint, and app.py applies it at
+startup. torch fixes inter-op threads once per process, so each inter-op
+value is measured in its own child process.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from batching import MicroBatcher
+
+MAX_LENGTH = 32           # same truncation as predict_intent in app.py
+MAX_WAIT_MS = 2.0         # batch fill window used by the tuned MicroBatcher
+SAMPLE_SIZE = 256
+
+
+# ============================================
+# HOST FINGERPRINT
+# ============================================
+def usable_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def cpu_model() -> str:
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def model_digest(model_path: str) -> str:
+    """Changes when the checkpoint does (config contents + file sizes)"""
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(model_path)):
+        path = os.path.join(model_path, name)
+        if os.path.isfile(path):
+            digest.update(f"{name}:{os.path.getsize(path)}".encode())
+    config_path = os.path.join(model_path, 'config.json')
+    if os.path.exists(config_path):
+        with open(config_path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def host_fingerprint(model_path: str) -> Dict[str, Any]:
+    import torch
+
+    host = {
+        'machine': platform.machine(),
+        'cpu': cpu_model(),
+        'cpus': usable_cpus(),
+        'python': platform.python_version(),
+        'torch': torch.__version__,
+        'model': model_digest(model_path)
+    }
+    host['id'] = hashlib.sha256(json.dumps(host, sort_keys=True).encode()).hexdigest()[:16]
+    return host
+
+
+# ============================================
+# BENCHMARK
+# ============================================
+def config_grid(cpus: int) -> List[Tuple[int, int, int]]:
+    """(intra-op threads, workers, batch size), without oversubscribing cores"""
+    threads = [t for t in (1, 2, 4, 8, 16) if t <= cpus]
+    return [(t, w, b) for t in threads for w in (1, 2, 4) for b in (1, 4, 8, 16) if t * w <= cpus]
+
+
+def measure(predict_batch: Callable[[List[str]], List[Any]], texts: Sequence[str],
+            threads: int, workers: int, batch_size: int,
+            requests: int = 400, max_seconds: float = 5.0) -> Dict[str, Any]:
+    """Closed loop: workers x batch_size clients, each sending one text at a time"""
+    import torch
+
+    torch.set_num_threads(threads)
+    batcher = MicroBatcher(predict_batch, workers, batch_size, MAX_WAIT_MS)
+    for text in texts[:workers * batch_size]:
+        batcher.submit(text)   # warm-up
+
+    clients = workers * batch_size
+    latencies: List[float] = []
+    lock = threading.Lock()
+    issued = 0
+    deadline = time.perf_counter() + max_seconds
+
+    def client(offset: int) -> None:
+        nonlocal issued
+        i = offset
+        while True:
+            with lock:
+                if issued >= requests or time.perf_counter() > deadline:
+                    return
+                issued += 1
+            started = time.perf_counter()
+            batcher.submit(texts[i % len(texts)])
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+            i += clients
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    wall = time.perf_counter() - started
+    batcher.close()
+
+    ms = np.array(latencies) * 1000
+    return {
+        'intra_op_threads': threads,
+        'inter_op_threads': torch.get_num_interop_threads(),
+        'workers': workers,
+        'batch_size': batch_size,
+        'max_wait_ms': MAX_WAIT_MS,
+        'requests': len(latencies),
+        'throughput': round(len(latencies) / wall, 1),
+        'p50_ms': round(float(np.percentile(ms, 50)), 2),
+        'p99_ms': round(float(np.percentile(ms, 99)), 2)
+    }
+
+
+def sample_texts(dataset_path: str, n: int = SAMPLE_SIZE, seed: int = 0) -> List[str]:
+    import pandas as pd
+
+    sentences = pd.read_csv(dataset_path)['sentence'].dropna().astype(str)
+    return sentences.sample(n=min(n, len(sentences)), random_state=seed).tolist()
+
+
+def sweep(model_path: str, dataset_path: str, interop: int) -> List[Dict[str, Any]]:
+    """Runs the whole grid in this process (call before torch does any work)"""
+    import torch
+
+    torch.set_num_interop_threads(interop)
+    from transformers import DistilBertForSequenceClassification, DistilBertTokenizerFast
+
+    tokenizer = DistilBertTokenizerFast.from_pretrained(model_path)
+    model = DistilBertForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+
+    def predict_batch(texts: List[str]) -> List[int]:
+        inputs = tokenizer(texts, return_tensors="pt", truncation=True, padding=True, max_length=MAX_LENGTH)
+        with torch.no_grad():
+            return model(**inputs).logits.argmax(dim=1).tolist()
+
+    texts = sample_texts(dataset_path)
+    results = []
+    for threads, workers, batch_size in config_grid(usable_cpus()):
+        result = measure(predict_batch, texts, threads, workers, batch_size)
+        print(f"  interop={interop} threads={threads} workers={workers} batch={batch_size}: "
+              f"{result['throughput']}/s p99={result['p99_ms']}ms", file=sys.stderr)
+        results.append(result)
+    return results
+
+
+# ============================================
+# SELECTION + PERSISTENCE
+# ============================================
+CONFIG_KEYS = ('intra_op_threads', 'inter_op_threads', 'workers', 'batch_size', 'max_wait_ms')
+
+
+def choose(results: List[Dict[str, Any]], p99_target_ms: float) -> Tuple[Dict[str, Any], bool]:
+    """Best throughput within the p99 target; lowest p99 if nothing meets it"""
+    within = [r for r in results if r['p99_ms'] <= p99_target_ms]
+    if within:
+        best = max(within, key=lambda r: (r['throughput'], -r['p99_ms']))
+    else:
+        best = min(results, key=lambda r: r['p99_ms'])
+    return {k: best[k] for k in CONFIG_KEYS}, bool(within)
+
+
+def load_tuning(store_path: str, model_path: str) -> Optional[Dict[str, Any]]:
+    """This host's saved result, or None"""
+    if not os.path.exists(store_path):
+        return None
+    with open(store_path) as f:
+        return json.load(f).get(host_fingerprint(model_path)['id'])
+
+
+def save_tuning(store_path: str, entry: Dict[str, Any]) -> None:
+    store = {}
+    if os.path.exists(store_path):
+        with open(store_path) as f:
+            store = json.load(f)
+    store[entry['host']['id']] = entry
+    tmp_path = store_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(store, f, indent=2)
+    os.replace(tmp_path, store_path)
+
+
+def autotune(model_path: str, dataset_path: str, store_path: str,
+             p99_target_ms: float = 100.0, interop_values: Sequence[int] = (1, 2)) -> Dict[str, Any]:
+    """Sweeps every inter-op value in a child process, saves and returns the result"""
+    started = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    for interop in interop_values:
+        fd, result_path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--sweep',
+                            '--interop', str(interop), '--model', model_path,
+                            '--dataset', dataset_path, '--result-file', result_path], check=True)
+            with open(result_path) as f:
+                results.extend(json.load(f))
+        finally:
+            os.remove(result_path)
+
+    config, meets_target = choose(results, p99_target_ms)
+    entry = {
+        'host': host_fingerprint(model_path),
+        'config': config,
+        'p99_target_ms': p99_target_ms,
+        'meets_target': meets_target,
+        'tuned_at': datetime.now(timezone.utc).isoformat(),
+        'seconds': round(time.perf_counter() - started, 1),
+        'results': results
+    }
+    save_tuning(store_path, entry)
+    return entry
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tune torch threads and intent batching for this host")
+    parser.add_argument('--model', default=os.environ.get("MODEL_PATH", "./model"))
+    parser.add_argument('--dataset', default='./intent_dataset.csv')
+    parser.add_argument('--store', default=os.environ.get("AUTOTUNE_PATH", "./autotune.json"))
+    parser.add_argument('--p99-ms', type=float, default=float(os.environ.get("AUTOTUNE_P99_MS", 100)))
+    parser.add_argument('--interop', default='1,2', help="comma-separated inter-op thread counts")
+    parser.add_argument('--sweep', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.sweep:
+        results = sweep(args.model, args.dataset, int(args.interop))
+        with open(args.result_file, 'w') as f:
+            json.dump(results, f)
+        return 0
+
+    entry = autotune(args.model, args.dataset, args.store, args.p99_ms,
+                     [int(n) for n in args.interop.split(',')])
+    status = "✅" if entry['meets_target'] else "⚠️ no setting met the p99 target;"
+    print(f"{status} host {entry['host']['id']}: {entry['config']} (saved to {args.store})")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
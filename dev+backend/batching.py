@@ -0,0 +1,90 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item calls into batched calls.
+
+    `workers` threads each take up to max_batch queued items and run
+    fn(items) -> results once for all of them. After the first item a worker
+    waits at most max_wait_ms for more, so an idle server adds no delay
+    beyond that and a busy one fills batches straight from the queue.
+    """
+
+    def __init__(self, fn: Callable[[List[Any]], List[Any]], workers: int = 1,
+                 max_batch: int = 1, max_wait_ms: float = 2.0):
+        self.fn = fn
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._run, daemon=True, name=f"batcher-{i}")
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, item: Any) -> Any:
+        """Blocks until the item's batch has run; re-raises its exception"""
+        future: Future = Future()
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._queue.put((item, future))
+        if closed:
+            return self.fn([item])[0]
+        return future.result()
+
+    def close(self) -> None:
+        """Stops the workers once everything already queued has run"""
+        with self._lock:
+            self._closed = True
+            for _ in self._threads:
+                self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is _STOP:
+                self._queue.put(_STOP)   # leave it for this worker's next turn
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            items = [item for item, _ in batch]
+            try:
+                results = self.fn(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
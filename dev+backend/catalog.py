@@ -0,0 +1,39 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from compression import precompress
+
+# ============================================
+# STATIC CATALOG
+# ============================================
+@dataclass(frozen=True)
+class CatalogEntry:
+    """One static response, serialized and compressed once at startup"""
+    bodies: Dict[str, bytes]   # encoding ('' = identity) -> body
+    etags: Dict[str, str]      # encoding -> strong ETag
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """True if any representation's ETag is in an If-None-Match header"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return not candidates.isdisjoint(self.etags.values())
+
+    def representation(self, encoding: Optional[str]) -> Tuple[bytes, str, Optional[str]]:
+        """(body, etag, content-encoding) for the negotiated encoding"""
+        if encoding not in self.bodies:
+            encoding = ''
+        return self.bodies[encoding], self.etags[encoding], encoding or None
+
+
+def build_entry(payload: Any) -> CatalogEntry:
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    bodies = precompress(body)
+    # Each encoding is a different representation, so each gets its own strong ETag
+    etags = {enc: f'"{digest}-{enc}"' if enc else f'"{digest}"' for enc in bodies}
+    return CatalogEntry(bodies=bodies, etags=etags)
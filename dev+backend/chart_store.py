@@ -0,0 +1,270 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# ============================================
+# PERIODS
+# ============================================
+# Same periods/resolutions as the frontend's chartDataService.js
+PERIODS = {
+    '1D': {'resolution': '5', 'days': 1},
+    '1W': {'resolution': '30', 'days': 7},
+    '1M': {'resolution': 'D', 'days': 30},
+    '3M': {'resolution': 'D', 'days': 90},
+    '1Y': {'resolution': 'W', 'days': 365}
+}
+
+RESOLUTION_SECONDS = {'5': 300, '30': 1800, 'D': 86400, 'W': 604800}
+
+# Tickers as Finnhub/Yahoo spell them (AAPL, BRK.B, ^NSEI, BINANCE:BTCUSDT)
+SYMBOL_PATTERN = re.compile(r'[A-Za-z0-9.^=:\-]{1,24}')
+
+
+# ============================================
+# ARRAY-BACKED SERIES
+# ============================================
+class Series:
+    """
+    Append-only (timestamp, close) columns in NumPy arrays.
+
+    Capacity doubles on growth so appends are amortised O(1); reads are
+    zero-copy views found with a binary search on the timestamp column.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.timestamps = np.empty(capacity, dtype=np.int64)
+        self.closes = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self.timestamps[self.size - 1]) if self.size else None
+
+    def extend(self, timestamps, closes) -> int:
+        """Appends candles newer than the last one (the last candle may be updated in place)"""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        closes = np.asarray(closes, dtype=np.float64)
+
+        if self.size:
+            last = self.timestamps[self.size - 1]
+            # A still-forming candle is re-sent with the same timestamp
+            same = timestamps == last
+            if same.any():
+                self.closes[self.size - 1] = closes[same][-1]
+            newer = timestamps > last
+            timestamps, closes = timestamps[newer], closes[newer]
+
+        count = len(timestamps)
+        if count == 0:
+            return 0
+        self._reserve(self.size + count)
+        self.timestamps[self.size:self.size + count] = timestamps
+        self.closes[self.size:self.size + count] = closes
+        self.size += count
+        return count
+
+    def _reserve(self, needed: int) -> None:
+        capacity = len(self.timestamps)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self.timestamps = np.resize(self.timestamps[:self.size], capacity)
+        self.closes = np.resize(self.closes[:self.size], capacity)
+
+    def since(self, start: int) -> Tuple[np.ndarray, np.ndarray]:
+        first = int(np.searchsorted(self.timestamps[:self.size], start, side='left'))
+        return self.timestamps[first:self.size], self.closes[first:self.size]
+
+
+# ============================================
+# LARGEST-TRIANGLE-THREE-BUCKETS
+# ============================================
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points LTTB keeps when reducing (x, y) to threshold points.
+
+    Keeps first and last points; for every bucket in between, keeps the point
+    forming the largest triangle with the previously kept point and the
+    average of the next bucket. Bucket averages are computed in one
+    np.add.reduceat pass; each bucket's area search is vectorised.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64, copy=False)
+    y = y.astype(np.float64, copy=False)
+
+    every = (n - 2) / (threshold - 2)
+    starts = (np.arange(threshold - 2) * every).astype(np.int64) + 1
+    ends = np.append(starts[1:], n - 1)
+
+    counts = ends - starts
+    avg_x = np.add.reduceat(x[:n - 1], starts) / counts
+    avg_y = np.add.reduceat(y[:n - 1], starts) / counts
+    # The "next bucket" of the last bucket is the final point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = starts[i], ends[i]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+# ============================================
+# CANDLE UPSTREAMS
+# ============================================
+FINNHUB_CANDLE_URL = 'https://finnhub.io/api/v1/stock/candle'
+
+
+class FinnhubCandles:
+    """Candles from Finnhub through the shared pooled client"""
+
+    def __init__(self, client, finnhub_key: str):
+        self.client = client
+        self.finnhub_key = finnhub_key
+
+    async def candles(self, symbol: str, resolution: str, start: int, end: int):
+        response = await self.client.get(FINNHUB_CANDLE_URL, params={
+            'symbol': symbol, 'resolution': resolution,
+            'from': start, 'to': end, 'token': self.finnhub_key
+        })
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        if data.get('s') != 'ok' or not data.get('c'):
+            return None
+        return data['t'], data['c']
+
+
+class StubCandles:
+    """Deterministic random-walk candles for tests and offline development"""
+
+    BASE_PRICES = {'TSLA': 450, 'MSFT': 380, 'AAPL': 175, 'NVDA': 500}
+
+    def __init__(self):
+        self.calls = 0
+
+    async def candles(self, symbol: str, resolution: str, start: int, end: int):
+        self.calls += 1
+        step = RESOLUTION_SECONDS[resolution]
+        timestamps = np.arange(start - start % step + step, end + 1, step, dtype=np.int64)
+        if len(timestamps) == 0:
+            return None
+        # Seeded by timestamp so overlapping fetches agree on the same candle
+        noise = np.sin(timestamps / (step * 7.0)) + 0.3 * np.cos(timestamps / (step * 1.3))
+        base = self.BASE_PRICES.get(symbol, 100)
+        return timestamps, base * (1 + 0.05 * noise)
+
+
+# ============================================
+# STORE
+# ============================================
+class _Entry:
+    __slots__ = ('series', 'checked', 'covered', 'failed', 'lock')
+
+    def __init__(self):
+        self.series: Optional[Series] = None
+        self.checked = 0.0              # last upstream call
+        self.covered: Optional[int] = None   # earliest start fetched
+        self.failed: Optional[int] = None    # start of the last full fetch that returned nothing
+        self.lock = asyncio.Lock()
+
+
+class ChartStore:
+    """
+    One Series per (symbol, resolution), shared by every client.
+
+    A series is topped up with only the candles after its last timestamp, at
+    most once per candle interval; concurrent top-ups of the same series are
+    coalesced behind a per-series lock. Failed or empty fetches are cached
+    for the candle interval too, so unknown symbols don't reach the upstream
+    on every request, and at most max_series are kept (least recently used
+    dropped first).
+    """
+
+    MAX_WIDTH = 2000
+
+    def __init__(self, upstream, clock=time.time, max_series: int = 256):
+        self.upstream = upstream
+        self._clock = clock
+        self.max_series = max_series
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+
+    async def chart(self, symbol: str, period: str, width: int) -> Optional[Dict[str, Any]]:
+        config = PERIODS[period]
+        key = (symbol.upper(), config['resolution'])
+        now = int(self._clock())
+        start = now - config['days'] * 86400
+
+        series = await self._refresh(key, start, now)
+        if series is None:
+            return None
+        timestamps, closes = series.since(start)
+        if len(closes) == 0:
+            return None
+
+        keep = lttb(timestamps, closes, max(3, min(width, self.MAX_WIDTH)))
+        timestamps, closes = timestamps[keep], closes[keep]
+
+        low, high = float(closes.min()), float(closes.max())
+        price_range = (high - low) or 1.0
+        return {
+            # Same shape the frontend's fetchChartData produced client-side
+            'data': ((closes - low) / price_range * 60 + 40).round(2).tolist(),
+            'rawPrices': closes.tolist(),
+            'timestamps': timestamps.tolist(),
+            'min': low,
+            'max': high
+        }
+
+    def _entry(self, key: Tuple[str, str]) -> _Entry:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry()
+            if len(self._entries) > self.max_series:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def _refresh(self, key: Tuple[str, str], start: int, now: int) -> Optional[Series]:
+        symbol, resolution = key
+        entry = self._entry(key)
+        async with entry.lock:
+            fresh = now - entry.checked < RESOLUTION_SECONDS[resolution]
+
+            if entry.covered is not None and entry.covered <= start:
+                if fresh:
+                    return entry.series
+                # Top up with only the candles after the last one we hold
+                candles = await self.upstream.candles(symbol, resolution,
+                                                      entry.series.last_timestamp or start, now)
+                if candles is not None:
+                    entry.series.extend(*candles)
+            else:
+                # First request, or the window grew past what we hold (1M -> 3M)
+                if fresh and entry.failed is not None and entry.failed <= start:
+                    return entry.series
+                candles = await self.upstream.candles(symbol, resolution, start, now)
+                if candles is None:
+                    entry.failed = start
+                else:
+                    entry.series = Series(max(len(candles[0]), 16))
+                    entry.series.extend(*candles)
+                    entry.covered, entry.failed = start, None
+
+            entry.checked = now
+            return entry.series
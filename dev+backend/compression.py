@@ -0,0 +1,135 @@
+import gzip
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli is optional - fall back to gzip only
+    brotli = None
+
+# ============================================
+# ENCODING NEGOTIATION
+# ============================================
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+COMPRESSIBLE_TYPES = (b'application/json', b'text/')
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Picks the best encoding we support from an Accept-Encoding header (br wins ties)"""
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def precompress(body: bytes) -> Dict[str, bytes]:
+    """Every supported representation of a static body, keyed by encoding ('' = identity)"""
+    bodies = {'': body}
+    for encoding in SUPPORTED_ENCODINGS:
+        # Static content is compressed once, so spend the CPU on the best ratio
+        if encoding == 'br':
+            bodies['br'] = brotli.compress(body, quality=11)
+        else:
+            bodies['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+    return bodies
+
+
+# ============================================
+# RESPONSE COMPRESSION MIDDLEWARE
+# ============================================
+class CompressionMiddleware:
+    """
+    gzip/brotli for complete (non-streaming) text responses.
+
+    Streaming bodies (SSE), small bodies, non-text types and responses that
+    already carry a Content-Encoding (precompressed catalog) pass through.
+    """
+
+    def __init__(self, app, minimum_size: int = 500):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        accept = None
+        for name, value in scope['headers']:
+            if name == b'accept-encoding':
+                accept = value.decode('latin-1')
+                break
+        encoding = choose_encoding(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        held_start = None
+
+        async def send_compressed(message):
+            nonlocal held_start
+
+            if message['type'] == 'http.response.start':
+                held_start = message
+                return
+
+            if message['type'] != 'http.response.body' or held_start is None:
+                await send(message)
+                return
+
+            start, held_start = held_start, None
+            body = message.get('body', b'')
+            headers: List[Tuple[bytes, bytes]] = list(start.get('headers', []))
+
+            if (message.get('more_body')
+                    or len(body) < self.minimum_size
+                    or not _is_compressible(headers)):
+                await send(start)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers = [(k, v) for k, v in headers if k.lower() != b'content-length']
+            headers += [
+                (b'content-encoding', encoding.encode()),
+                (b'content-length', str(len(compressed)).encode()),
+                (b'vary', b'Accept-Encoding'),
+            ]
+            await send({**start, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _is_compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+    content_type = b''
+    for name, value in headers:
+        name = name.lower()
+        if name == b'content-encoding':
+            return False
+        if name == b'content-type':
+            content_type = value
+    return content_type.startswith(COMPRESSIBLE_TYPES)
@@ -0,0 +1,95 @@
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# ============================================
+# DIALOG STATES
+# ============================================
+class DialogState(IntEnum):
+    """Where a session is in the conversation"""
+    IDLE = 0
+    AWAITING_BANK = 1
+    BANK_SELECTED = 2
+    LOAN_OPTIONS = 3
+    AWAITING_CALCULATION = 4
+
+
+# ============================================
+# SESSION RECORD
+# ============================================
+@dataclass(slots=True)
+class SessionState:
+    """Compact per-session record (replaces the old free-form context dict)"""
+    state: DialogState = DialogState.IDLE
+    intent: Optional[str] = None
+    bank: Optional[str] = None
+    original_query: str = ''
+
+    def to_record(self) -> Tuple[int, Optional[str], Optional[str], str]:
+        """Plain tuple form, safe to serialize"""
+        return (int(self.state), self.intent, self.bank, self.original_query)
+
+    @classmethod
+    def from_record(cls, record) -> "SessionState":
+        state, intent, bank, original_query = record
+        return cls(DialogState(state), intent, bank, original_query)
+
+
+# ============================================
+# TURN
+# ============================================
+_UNSET = object()
+
+class Turn:
+    """One user message; bank detection runs at most once per turn"""
+    __slots__ = ('text', 'lower', '_bank', '_detect_bank')
+
+    def __init__(self, text: str, detect_bank: Callable[[str], Optional[str]]):
+        self.text = text
+        self.lower = text.lower()
+        self._bank = _UNSET
+        self._detect_bank = detect_bank
+
+    @property
+    def bank(self) -> Optional[str]:
+        if self._bank is _UNSET:
+            self._bank = self._detect_bank(self.text)
+        return self._bank
+
+
+# ============================================
+# STATE MACHINE
+# ============================================
+# A handler returns (response, next_session). next_session=None ends the session.
+Guard = Callable[[Turn, SessionState], bool]
+Handler = Callable[[Turn, SessionState], Tuple[Dict[str, Any], Optional[SessionState]]]
+
+class DialogMachine:
+    """
+    Table-driven dialog dispatch.
+
+    Each state owns a short, ordered list of (guard, handler) rules. The table is
+    frozen by compile() so dispatch is a single dict lookup on the current state
+    followed by that state's rules. Turns no rule claims go to the fallback,
+    which is the only path that runs model inference.
+    """
+
+    def __init__(self, fallback: Handler):
+        self._rules: Dict[DialogState, List[Tuple[Guard, Handler]]] = {s: [] for s in DialogState}
+        self._table: Optional[Dict[DialogState, Tuple[Tuple[Guard, Handler], ...]]] = None
+        self._fallback = fallback
+
+    def on(self, state: DialogState, guard: Guard, handler: Handler) -> None:
+        if self._table is not None:
+            raise RuntimeError("DialogMachine is already compiled")
+        self._rules[state].append((guard, handler))
+
+    def compile(self) -> "DialogMachine":
+        self._table = {state: tuple(rules) for state, rules in self._rules.items()}
+        return self
+
+    def dispatch(self, turn: Turn, session: SessionState):
+        for guard, handler in self._table[session.state]:
+            if guard(turn, session):
+                return handler(turn, session)
+        return self._fallback(turn, session)
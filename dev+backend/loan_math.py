@@ -0,0 +1,197 @@
+from decimal import ROUND_HALF_UP, Decimal, localcontext
+from functools import lru_cache
+from typing import Any, Dict
+
+import numpy as np
+
+# ============================================
+# STANDARD HOME LOAN ASSUMPTIONS
+# ============================================
+FOIR = 0.50                 # max 50% of income can go to EMIs
+INTEREST_RATE_ANNUAL = 8.5  # typical home loan rate (% p.a.)
+TENURE_MONTHS = 240         # 20 years
+LTV_RATIO = 0.80            # max 80% of property value
+
+# EMI = P × r × (1+r)^n / ((1+r)^n - 1)   and   P = EMI × annuity factor
+# where annuity factor = ((1+r)^n - 1) / (r × (1+r)^n)
+
+
+# ============================================
+# FLOAT PATH (memoized)
+# ============================================
+@lru_cache(maxsize=4096)
+def annuity_factor(annual_rate: float, months: int) -> float:
+    """Principal repaid by an EMI of 1 over `months` at `annual_rate` % p.a."""
+    r = annual_rate / 12 / 100
+    if r == 0:
+        return float(months)
+    growth = (1 + r) ** months
+    return (growth - 1) / (r * growth)
+
+
+def emi_for_principal(principal: float, annual_rate: float, months: int) -> float:
+    return principal / annuity_factor(annual_rate, months) if principal > 0 else 0.0
+
+
+def principal_for_emi(emi: float, annual_rate: float, months: int) -> float:
+    return emi * annuity_factor(annual_rate, months) if emi > 0 else 0.0
+
+
+def annuity_factors(annual_rates, months):
+    """Vectorised annuity factor for arrays of rates (% p.a.) and tenures (months)"""
+    r = np.asarray(annual_rates, dtype=np.float64) / 1200
+    n = np.asarray(months, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = -np.expm1(-n * np.log1p(r)) / r
+    return np.where(r == 0, n, factor)
+
+
+# ============================================
+# EXACT PATH (Decimal, paise)
+# ============================================
+_PRECISION = 40
+_PAISA = Decimal('0.01')
+
+@lru_cache(maxsize=4096)
+def annuity_factor_exact(annual_rate: Decimal, months: int) -> Decimal:
+    """annuity_factor in 40-digit Decimal arithmetic"""
+    with localcontext() as ctx:
+        ctx.prec = _PRECISION
+        r = Decimal(annual_rate) / 1200
+        if r == 0:
+            return Decimal(months)
+        growth = (1 + r) ** months
+        return (growth - 1) / (r * growth)
+
+
+def to_paise(rupees) -> int:
+    return int((Decimal(str(rupees)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_paise(paise: int) -> Decimal:
+    return (Decimal(paise) / 100).quantize(_PAISA)
+
+
+def _round_paise(amount: Decimal) -> int:
+    return int((amount * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+# ============================================
+# ELIGIBILITY
+# ============================================
+RISK_BANDS = [
+    (40, "Excellent - Low Risk"),
+    (50, "Good - Moderate Risk"),
+    (60, "Moderate - Higher Risk"),
+]
+HIGH_RISK = "High Risk - Caution Advised"
+
+def risk_band(debt_to_income_ratio) -> str:
+    for limit, label in RISK_BANDS:
+        if debt_to_income_ratio <= limit:
+            return label
+    return HIGH_RISK
+
+
+def loan_eligibility(monthly_income, existing_emi, property_value,
+                     annual_rate: float = INTEREST_RATE_ANNUAL, months: int = TENURE_MONTHS,
+                     foir: float = FOIR, ltv: float = LTV_RATIO) -> Dict[str, Any]:
+    """
+    Max loan by FOIR and LTV, the EMI on it and the resulting DTI (floats).
+
+    The annuity factor is computed once per (rate, tenure) for the process;
+    when the FOIR limit binds, the EMI is the affordable EMI itself rather
+    than being recomputed from the principal.
+    """
+    max_new_emi = max(monthly_income * foir - existing_emi, 0)
+    eligible_loan_amount = principal_for_emi(max_new_emi, annual_rate, months)
+
+    max_loan_by_ltv = property_value * ltv
+    if eligible_loan_amount > max_loan_by_ltv:
+        eligible_loan_amount = max_loan_by_ltv
+        monthly_emi = emi_for_principal(eligible_loan_amount, annual_rate, months)
+    else:
+        monthly_emi = max_new_emi if eligible_loan_amount > 0 else 0
+
+    total_obligation = existing_emi + monthly_emi
+    debt_to_income_ratio = (total_obligation / monthly_income * 100) if monthly_income > 0 else 0
+
+    return {
+        'eligible_loan_amount': round(eligible_loan_amount, 2),
+        'monthly_emi': round(monthly_emi, 2),
+        'total_monthly_obligation': round(total_obligation, 2),
+        'debt_to_income_ratio': round(debt_to_income_ratio, 2),
+        'recommendation': risk_band(debt_to_income_ratio),
+        'max_ltv_amount': round(max_loan_by_ltv, 2),
+        'interest_rate': annual_rate,
+        'tenure_years': months // 12
+    }
+
+
+def loan_eligibility_exact(monthly_income, existing_emi, property_value,
+                           annual_rate=INTEREST_RATE_ANNUAL, months: int = TENURE_MONTHS,
+                           foir=FOIR, ltv=LTV_RATIO) -> Dict[str, Any]:
+    """
+    Same as loan_eligibility, in Decimal with every amount held as integer
+    paise (rounded half-up once, where it is produced). Amounts are returned
+    as Decimal rupees with exactly two places.
+    """
+    rate, foir, ltv = Decimal(str(annual_rate)), Decimal(str(foir)), Decimal(str(ltv))
+    income_paise, existing_paise = to_paise(monthly_income), to_paise(existing_emi)
+    factor = annuity_factor_exact(rate, months)
+
+    with localcontext() as ctx:
+        ctx.prec = _PRECISION
+        max_new_emi_paise = max(_round_paise(from_paise(income_paise) * foir) - existing_paise, 0)
+        eligible_paise = _round_paise(from_paise(max_new_emi_paise) * factor) if max_new_emi_paise else 0
+
+        max_ltv_paise = _round_paise(Decimal(str(property_value)) * ltv)
+        if eligible_paise > max_ltv_paise:
+            eligible_paise = max_ltv_paise
+            emi_paise = _round_paise(from_paise(eligible_paise) / factor) if eligible_paise else 0
+        else:
+            emi_paise = max_new_emi_paise if eligible_paise else 0
+
+        total_paise = existing_paise + emi_paise
+        dti = ((Decimal(total_paise) / income_paise * 100).quantize(_PAISA, rounding=ROUND_HALF_UP)
+               if income_paise > 0 else Decimal('0.00'))
+
+    return {
+        'eligible_loan_amount': from_paise(eligible_paise),
+        'monthly_emi': from_paise(emi_paise),
+        'total_monthly_obligation': from_paise(total_paise),
+        'debt_to_income_ratio': dti,
+        'recommendation': risk_band(dti),
+        'max_ltv_amount': from_paise(max_ltv_paise),
+        'interest_rate': rate,
+        'tenure_years': months // 12
+    }
+
+
+def loan_eligibility_batch(monthly_income, existing_emi, property_value,
+                           annual_rate: float = INTEREST_RATE_ANNUAL, months: int = TENURE_MONTHS,
+                           foir: float = FOIR, ltv: float = LTV_RATIO) -> Dict[str, np.ndarray]:
+    """loan_eligibility over arrays of applicants; the annuity factor is shared by all rows"""
+    income = np.asarray(monthly_income, dtype=np.float64)
+    existing = np.asarray(existing_emi, dtype=np.float64)
+    value = np.asarray(property_value, dtype=np.float64)
+
+    factor = annuity_factor(annual_rate, months)
+    max_new_emi = np.maximum(income * foir - existing, 0.0)
+    max_ltv = value * ltv
+    amount = np.minimum(max_new_emi * factor, max_ltv)
+    emi = np.where(max_new_emi * factor > max_ltv, amount / factor, max_new_emi)
+    emi = np.where(amount > 0, emi, 0.0)
+    total = existing + emi
+    dti = np.divide(total * 100, income, out=np.zeros_like(total), where=income > 0)
+    recommendation = np.select([dti <= limit for limit, _ in RISK_BANDS],
+                               [label for _, label in RISK_BANDS], HIGH_RISK)
+
+    return {
+        'eligible_loan_amount': amount.round(2),
+        'monthly_emi': emi.round(2),
+        'total_monthly_obligation': total.round(2),
+        'debt_to_income_ratio': dti.round(2),
+        'recommendation': recommendation,
+        'max_ltv_amount': max_ltv.round(2)
+    }
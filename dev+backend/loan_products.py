@@ -0,0 +1,166 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from loan_math import FOIR, LTV_RATIO, annuity_factors
+
+# ============================================
+# PRODUCT PARSING (once, at startup)
+# ============================================
+DEFAULT_TENURE_YEARS = {'home': 20, 'personal': 5}
+
+_AMOUNT_UNITS = {'crore': 1e7, 'lakh': 1e5}
+
+_RANGE_RE = re.compile(r'(\d+)\s*-\s*(\d+)')
+_NUMBER_RE = re.compile(r'[\d,]+(?:\.\d+)?')
+_AMOUNT_RE = re.compile(r'([\d,.]+)\s*(crore|lakh)?', re.IGNORECASE)
+_RATE_RE = re.compile(r'([\d.]+)%\s*(?:-\s*([\d.]+)%)?')
+
+
+@dataclass(frozen=True)
+class LoanProduct:
+    bank: str
+    name: str
+    kind: str                     # 'home' | 'personal'
+    min_age: int = 0
+    max_age: int = 200
+    min_income: float = 0.0
+    min_credit_score: int = 0
+    min_experience_years: float = 0.0
+    max_amount: float = float('inf')
+    rate_min: float = float('nan')
+    rate_max: float = float('nan')
+    link: Optional[str] = None
+
+
+def _number(text: str) -> float:
+    return float(_NUMBER_RE.search(text).group().replace(',', ''))
+
+
+def parse_product(bank: str, workflow: Dict[str, Any]) -> LoanProduct:
+    """Reads the 'Key: value' eligibility lines of one loan workflow (unparseable lines are skipped)"""
+    fields: Dict[str, Any] = {}
+    name = workflow['name']
+    for step in workflow.get('steps', []):
+        try:
+            _parse_field(step, fields)
+        except (AttributeError, ValueError):   # a regex found nothing / not a number
+            print(f"⚠️ {bank} {name}: skipping unrecognised line {step!r}")
+
+    kind = 'personal' if 'personal' in name.lower() else 'home'
+    return LoanProduct(bank=bank, name=name, kind=kind, link=workflow.get('link'), **fields)
+
+
+def _parse_field(step: str, fields: Dict[str, Any]) -> None:
+    label, _, value = step.partition(':')
+    label = label.strip().lower()
+    value = value.strip()
+
+    if label == 'age':
+        low, high = _RANGE_RE.search(value).groups()
+        fields['min_age'], fields['max_age'] = int(low), int(high)
+    elif label == 'min income':
+        fields['min_income'] = _number(value)
+    elif label == 'credit score':
+        fields['min_credit_score'] = int(_number(value))
+    elif label in ('employment', 'work experience'):
+        fields['min_experience_years'] = _number(value)
+    elif label == 'loan amount':
+        amount, unit = _AMOUNT_RE.search(value.replace('₹', '')).groups()
+        fields['max_amount'] = float(amount.replace(',', '')) * _AMOUNT_UNITS.get((unit or '').lower(), 1)
+    elif label == 'interest rate':
+        low, high = _RATE_RE.search(value).groups()
+        fields['rate_min'] = float(low)
+        fields['rate_max'] = float(high or low)
+
+
+def parse_products(loan_handlers: Dict[str, Any]) -> List[LoanProduct]:
+    """All products from INTENT_HANDLERS['loan_eligibility_check']"""
+    return [
+        parse_product(bank, workflow)
+        for bank, handler in loan_handlers.items()
+        for workflow in handler.get('workflows', [])
+    ]
+
+
+# ============================================
+# COLUMNAR PRODUCT TABLE
+# ============================================
+class ProductTable:
+    """
+    Products as NumPy columns so one applicant is scored against all in a
+    single pass. Products without a parsed interest rate can't be priced;
+    they are kept aside in not_comparable instead of being ranked.
+    """
+
+    def __init__(self, products: List[LoanProduct]):
+        self.products = [p for p in products if np.isfinite(p.rate_min)]
+        self.not_comparable = [p for p in products if not np.isfinite(p.rate_min)]
+        products = self.products
+        column = lambda attr, dtype=np.float64: np.array([getattr(p, attr) for p in products], dtype=dtype)
+        self.min_age = column('min_age')
+        self.max_age = column('max_age')
+        self.min_income = column('min_income')
+        self.min_credit_score = column('min_credit_score')
+        self.min_experience_years = column('min_experience_years')
+        self.max_amount = column('max_amount')
+        self.rate_min = column('rate_min')
+        self.rate_max = column('rate_max')
+        self.is_home = np.array([p.kind == 'home' for p in products])
+        self.default_tenure_months = np.array([DEFAULT_TENURE_YEARS[p.kind] * 12 for p in products])
+
+    def compare(self, monthly_income: float, existing_emi: float, age: int, credit_score: int,
+                experience_years: float, property_value: Optional[float] = None,
+                loan_amount: Optional[float] = None, tenure_years: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Eligibility, amount and EMI for every product, ranked best first"""
+        n = (np.full(len(self.products), tenure_years * 12) if tenure_years
+             else self.default_tenure_months)
+
+        checks = {
+            'age': (self.min_age <= age) & (age <= self.max_age),
+            'income': monthly_income >= self.min_income,
+            'credit_score': credit_score >= self.min_credit_score,
+            'experience': experience_years >= self.min_experience_years,
+        }
+
+        # Affordable principal at the best advertised rate, capped by product and LTV
+        max_new_emi = max(monthly_income * FOIR - existing_emi, 0.0)
+        annuity_best = annuity_factors(self.rate_min, n)
+        max_amount = np.minimum(max_new_emi * annuity_best, self.max_amount)
+        if property_value is not None:
+            max_amount = np.where(self.is_home, np.minimum(max_amount, property_value * LTV_RATIO), max_amount)
+
+        principal = np.minimum(loan_amount, max_amount) if loan_amount is not None else max_amount
+        if loan_amount is not None:
+            checks['amount'] = loan_amount <= max_amount
+        eligible = np.logical_and.reduce(list(checks.values())) & (max_amount > 0)
+
+        emi_best = np.divide(principal, annuity_best, out=np.zeros_like(principal), where=annuity_best > 0)
+        annuity_worst = annuity_factors(self.rate_max, n)
+        emi_worst = np.divide(principal, annuity_worst, out=np.zeros_like(principal), where=annuity_worst > 0)
+        dti = (existing_emi + emi_best) / monthly_income * 100 if monthly_income > 0 else np.zeros_like(emi_best)
+
+        # Eligible first, then cheapest rate, then largest amount
+        order = np.lexsort((-max_amount, self.rate_min, ~eligible))
+
+        results = []
+        for i in order:
+            product = self.products[i]
+            results.append({
+                'bank': product.bank,
+                'product': product.name,
+                'eligible': bool(eligible[i]),
+                'failed_checks': [name for name, passed in checks.items() if not passed[i]],
+                'max_loan_amount': round(float(max_amount[i]), 2),
+                'loan_amount': round(float(principal[i]), 2),
+                'tenure_years': int(n[i]) // 12,
+                'interest_rate_range': [product.rate_min, product.rate_max],
+                'monthly_emi': round(float(emi_best[i]), 2),
+                'monthly_emi_at_max_rate': round(float(emi_worst[i]), 2),
+                'debt_to_income_ratio': round(float(dti[i]), 2),
+                'link': product.link
+            })
+        return results
+
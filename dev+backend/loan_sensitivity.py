@@ -0,0 +1,104 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from loan_math import annuity_factors
+
+# ============================================
+# SENSITIVITY GRID
+# ============================================
+MAX_GRID_CELLS = 250_000
+
+
+def sensitivity_grid(monthly_income: float, existing_emi: float, property_value: float,
+                     rates: Sequence[float], tenures_years: Sequence[int],
+                     foirs: Sequence[float], ltvs: Sequence[float]) -> Dict[str, Any]:
+    """
+    Eligible amount, EMI and DTI over rate x tenure x FOIR x LTV.
+
+    Each axis becomes its own broadcast dimension, so the whole surface is
+    a handful of array operations regardless of grid size:
+      amount = min(max(income*FOIR - existing, 0) * annuity(rate, tenure), property*LTV)
+    """
+    rate = np.asarray(rates, dtype=np.float64)[:, None, None, None]
+    months = np.asarray(tenures_years, dtype=np.float64)[None, :, None, None] * 12
+    foir = np.asarray(foirs, dtype=np.float64)[None, None, :, None]
+    ltv = np.asarray(ltvs, dtype=np.float64)[None, None, None, :]
+
+    annuity = annuity_factors(rate, months)
+    max_new_emi = np.maximum(monthly_income * foir - existing_emi, 0.0)
+    amount = np.minimum(max_new_emi * annuity, property_value * ltv)
+    emi = amount / annuity
+    dti = (existing_emi + emi) / monthly_income * 100
+
+    return {
+        'axes': {
+            'interest_rate': list(rates),
+            'tenure_years': list(tenures_years),
+            'foir': list(foirs),
+            'ltv': list(ltvs)
+        },
+        'shape': list(amount.shape),
+        'eligible_amount': amount.round(2).tolist(),
+        'monthly_emi': emi.round(2).tolist(),
+        'debt_to_income_ratio': dti.round(2).tolist()
+    }
+
+
+# ============================================
+# FLOATING-RATE MONTE CARLO
+# ============================================
+def floating_rate_paths(loan_amount: float, monthly_income: float, existing_emi: float,
+                        base_rate: float, tenure_years: int, paths: int = 2000,
+                        annual_volatility_bp: float = 75.0, annual_drift_bp: float = 0.0,
+                        reset_every_months: int = 12, dti_limit: float = 50.0,
+                        seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Simulates floating-rate loans whose EMI is reset on the outstanding
+    balance every reset_every_months. All paths advance together (one array
+    op per month); rates follow a Gaussian random walk floored at 0.
+    """
+    rng = np.random.default_rng(seed)
+    months = tenure_years * 12
+    resets = np.arange(reset_every_months, months, reset_every_months)
+
+    # Annual rate in force after each reset, per path
+    # (drift scales with the reset interval, volatility with its square root)
+    dt = reset_every_months / 12
+    shocks = rng.normal(annual_drift_bp * dt, annual_volatility_bp * np.sqrt(dt),
+                        size=(paths, len(resets))) / 100
+    reset_rates = np.maximum(base_rate + np.cumsum(shocks, axis=1), 0.0)
+
+    balance = np.full(paths, float(loan_amount))
+    rate = np.full(paths, float(base_rate))
+    emi = balance / annuity_factors(rate, months)
+    peak_emi = emi.copy()
+    total_interest = np.zeros(paths)
+
+    reset_index = 0
+    for month in range(months):
+        if reset_index < len(resets) and month == resets[reset_index]:
+            rate = reset_rates[:, reset_index]
+            emi = balance / annuity_factors(rate, months - month)
+            np.maximum(peak_emi, emi, out=peak_emi)
+            reset_index += 1
+        interest = balance * rate / 1200
+        total_interest += interest
+        balance = np.maximum(balance - (emi - interest), 0.0)
+
+    peak_dti = (existing_emi + peak_emi) / monthly_income * 100
+    percentiles = [5, 50, 95]
+    return {
+        'paths': paths,
+        'percentiles': percentiles,
+        'final_rate': _percentiles(reset_rates[:, -1] if len(resets) else rate, percentiles),
+        'peak_emi': _percentiles(peak_emi, percentiles),
+        'total_interest': _percentiles(total_interest, percentiles),
+        'peak_dti': _percentiles(peak_dti, percentiles),
+        'probability_dti_exceeds_limit': round(float(np.mean(peak_dti.round(6) > dti_limit)), 4),
+        'dti_limit': dti_limit
+    }
+
+
+def _percentiles(values: np.ndarray, percentiles: List[int]) -> List[float]:
+    return np.percentile(values, percentiles).round(2).tolist()
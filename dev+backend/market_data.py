@@ -0,0 +1,276 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+# ============================================
+# SHARED TTL CACHE (STALE-WHILE-REVALIDATE)
+# ============================================
+class SWRCache:
+    """
+    Async TTL cache shared by every client.
+
+    - fresh (age < ttl): served from memory
+    - stale (age < ttl + stale_ttl): served from memory, one background refresh
+    - missing/expired: caller waits for the refresh
+    Concurrent refreshes of the same key are coalesced into one task.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = self._clock() - entry[0]
+            if age < self.ttl:
+                return entry[1]
+            if age < self.ttl + self.stale_ttl:
+                self._refresh(key, loader)
+                return entry[1]
+        # Shielded: a cancelled waiter mustn't cancel the refresh others share
+        return await asyncio.shield(self._refresh(key, loader))
+
+    def _refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+        return task
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+            self._entries[key] = (self._clock(), value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def age(self, key: str) -> Optional[float]:
+        entry = self._entries.get(key)
+        return None if entry is None else self._clock() - entry[0]
+
+
+# ============================================
+# UPSTREAMS
+# ============================================
+INDICES = [
+    {'symbol': 'SPY', 'name': 'S&P 500', 'currency': '$', 'source': 'finnhub'},
+    {'symbol': 'QQQ', 'name': 'NASDAQ', 'currency': '$', 'source': 'finnhub'},
+    {'symbol': 'DIA', 'name': 'DOW JONES', 'currency': '$', 'source': 'finnhub'},
+    {'symbol': '^NSEI', 'name': 'NIFTY 50', 'currency': '₹', 'source': 'yahoo'}
+]
+
+# Stock name mapping (the Finnhub profile endpoint requires a paid plan)
+POPULAR_STOCKS = {
+    'NVDA': 'NVIDIA Corp',
+    'TSLA': 'Tesla Inc',
+    'AAPL': 'Apple Inc',
+    'MSFT': 'Microsoft Corp',
+    'GOOGL': 'Alphabet Inc'
+}
+
+FINNHUB_BASE_URL = 'https://finnhub.io/api/v1'
+YAHOO_CHART_URL = 'https://query1.finance.yahoo.com/v8/finance/chart/{symbol}'
+EXCHANGE_RATE_URL = 'https://api.exchangerate-api.com/v4/latest/USD'
+
+
+class HttpMarketUpstream:
+    """Finnhub / Yahoo / exchangerate-api through one pooled async client"""
+
+    def __init__(self, client: httpx.AsyncClient, finnhub_key: str):
+        self.client = client
+        self.finnhub_key = finnhub_key
+
+    async def quote(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Finnhub quote -> {price, change, changePercent}, None if unavailable"""
+        response = await self.client.get(f"{FINNHUB_BASE_URL}/quote",
+                                          params={'symbol': symbol, 'token': self.finnhub_key})
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        if not data or not data.get('c'):
+            return None
+        # float() turns a null d/dp into a TypeError here, inside _safe, not mid-sort
+        return {'price': float(data['c']), 'change': float(data['d']), 'changePercent': float(data['dp'])}
+
+    async def yahoo_quote(self, symbol: str) -> Optional[Dict[str, float]]:
+        response = await self.client.get(YAHOO_CHART_URL.format(symbol=symbol),
+                                          params={'interval': '1d', 'range': '1d'},
+                                          headers={'User-Agent': 'Mozilla/5.0'})
+        if response.status_code != 200:
+            return None
+        result = (response.json().get('chart') or {}).get('result')
+        if not result:
+            return None
+        meta = result[0]['meta']
+        price, previous_close = meta['regularMarketPrice'], meta['chartPreviousClose']
+        change = price - previous_close
+        return {'price': price, 'change': change, 'changePercent': change / previous_close * 100}
+
+    async def usd_rates(self) -> Optional[Dict[str, float]]:
+        response = await self.client.get(EXCHANGE_RATE_URL)
+        if response.status_code != 200:
+            return None
+        return response.json()['rates']
+
+
+class StubMarketUpstream:
+    """Fixed quotes for tests and offline development (no network)"""
+
+    QUOTES = {
+        'SPY': (478.35, 4.23, 0.89), 'QQQ': (396.87, 3.45, 0.88), 'DIA': (373.16, -1.45, -0.39),
+        '^NSEI': (24180.25, 178.50, 0.74), 'NVDA': (495.22, 12.34, 2.56),
+        'TSLA': (248.48, -3.21, -1.27), 'AAPL': (189.84, 2.15, 1.15),
+        'MSFT': (378.91, 5.67, 1.52), 'GOOGL': (141.80, 1.23, 0.87)
+    }
+
+    def __init__(self):
+        self.calls = 0
+
+    async def quote(self, symbol: str) -> Optional[Dict[str, float]]:
+        self.calls += 1
+        if symbol not in self.QUOTES:
+            return None
+        price, change, change_percent = self.QUOTES[symbol]
+        return {'price': price, 'change': change, 'changePercent': change_percent}
+
+    yahoo_quote = quote
+
+    async def usd_rates(self) -> Optional[Dict[str, float]]:
+        self.calls += 1
+        return {'INR': 83.15, 'EUR': 0.919, 'GBP': 0.813}
+
+
+# ============================================
+# SNAPSHOT SERVICE
+# ============================================
+class MarketDataService:
+    """Builds the dashboard's market snapshot; upstream traffic is one refresh per TTL"""
+
+    SNAPSHOT_KEY = 'snapshot'
+
+    def __init__(self, upstream, cache: SWRCache):
+        self.upstream = upstream
+        self.cache = cache
+
+    async def snapshot(self) -> Dict[str, Any]:
+        return await self.cache.get(self.SNAPSHOT_KEY, self._build_snapshot)
+
+    async def _build_snapshot(self) -> Dict[str, Any]:
+        indices, stocks, currencies = await asyncio.gather(
+            self._indices(), self._stocks(), self._currencies()
+        )
+        # Trending = biggest movers either way; gainers/losers = top 3 each side
+        trending = sorted(stocks, key=lambda s: abs(s['changePercent']), reverse=True)[:5]
+        gainers = sorted((s for s in stocks if s['changePercent'] > 0),
+                         key=lambda s: s['changePercent'], reverse=True)[:3]
+        losers = sorted((s for s in stocks if s['changePercent'] < 0),
+                        key=lambda s: s['changePercent'])[:3]
+
+        # Empty sections fall back to MOCK_SNAPSHOT and are named in
+        # mock_sections, so a cached snapshot never passes sample data off as live
+        live = {'indices': indices, 'trending': trending, 'gainers': gainers,
+                'losers': losers, 'currencies': currencies}
+        mock_sections = [name for name, value in live.items() if not value]
+        if not mock_sections:
+            source = 'live'
+        elif len(mock_sections) == len(live):
+            source = 'mock'
+        else:
+            source = 'partial'
+
+        return {
+            **{name: value or MOCK_SNAPSHOT[name] for name, value in live.items()},
+            'source': source,
+            'mock_sections': mock_sections,
+            'fetched_at': time.time()
+        }
+
+    async def _safe(self, call: Awaitable) -> Optional[Any]:
+        try:
+            return await call
+        except (httpx.HTTPError, KeyError, TypeError, ValueError, ZeroDivisionError) as e:
+            print(f"⚠️ Market upstream error: {e}")
+            return None
+
+    async def _indices(self) -> List[Dict[str, Any]]:
+        quotes = await asyncio.gather(*(
+            self._safe(self.upstream.yahoo_quote(index['symbol']) if index['source'] == 'yahoo'
+                       else self.upstream.quote(index['symbol']))
+            for index in INDICES
+        ))
+        return [
+            {'name': index['name'], 'symbol': index['symbol'], 'currency': index['currency'], **quote}
+            for index, quote in zip(INDICES, quotes)
+            if quote and quote['price'] > 0
+        ]
+
+    async def _stocks(self) -> List[Dict[str, Any]]:
+        quotes = await asyncio.gather(*(self._safe(self.upstream.quote(symbol)) for symbol in POPULAR_STOCKS))
+        return [
+            {'symbol': symbol, 'name': name, 'currency': '$', **quote}
+            for (symbol, name), quote in zip(POPULAR_STOCKS.items(), quotes)
+            if quote and quote['price'] > 0
+        ]
+
+    async def _currencies(self) -> Optional[Dict[str, Any]]:
+        rates = await self._safe(self.upstream.usd_rates())
+        if not rates:
+            return None
+        try:
+            inr = rates['INR']
+            return {
+                'usdInr': {'pair': 'USD/INR', 'rate': f"{inr:.2f}", 'change': 0.2, 'symbol': '₹'},
+                'eurInr': {'pair': 'EUR/INR', 'rate': f"{inr / rates['EUR']:.2f}", 'change': -0.1, 'symbol': '₹'},
+                'gbpInr': {'pair': 'GBP/INR', 'rate': f"{inr / rates['GBP']:.2f}", 'change': 0.3, 'symbol': '₹'}
+            }
+        except (KeyError, TypeError, ValueError, ZeroDivisionError) as e:
+            print(f"⚠️ Market upstream error: bad rates payload ({e})")
+            return None
+
+
+MOCK_SNAPSHOT = {
+    'indices': [
+        {'name': 'S&P 500', 'symbol': 'SPY', 'price': 478.35, 'change': 4.23, 'changePercent': 0.89, 'currency': '$'},
+        {'name': 'NASDAQ', 'symbol': 'QQQ', 'price': 396.87, 'change': 3.45, 'changePercent': 0.88, 'currency': '$'},
+        {'name': 'DOW JONES', 'symbol': 'DIA', 'price': 373.16, 'change': -1.45, 'changePercent': -0.39, 'currency': '$'},
+        {'name': 'NIFTY 50', 'symbol': '^NSEI', 'price': 24180.25, 'change': 178.50, 'changePercent': 0.74, 'currency': '₹'}
+    ],
+    'trending': [
+        {'symbol': 'NVDA', 'name': 'NVIDIA Corp', 'price': 495.22, 'change': 12.34, 'changePercent': 2.56, 'currency': '$'},
+        {'symbol': 'TSLA', 'name': 'Tesla Inc', 'price': 248.48, 'change': -3.21, 'changePercent': -1.27, 'currency': '$'},
+        {'symbol': 'AAPL', 'name': 'Apple Inc', 'price': 189.84, 'change': 2.15, 'changePercent': 1.15, 'currency': '$'},
+        {'symbol': 'MSFT', 'name': 'Microsoft Corp', 'price': 378.91, 'change': 5.67, 'changePercent': 1.52, 'currency': '$'},
+        {'symbol': 'GOOGL', 'name': 'Alphabet Inc', 'price': 141.80, 'change': 1.23, 'changePercent': 0.87, 'currency': '$'}
+    ],
+    'gainers': [
+        {'symbol': 'AMD', 'name': 'Advanced Micro Devices', 'price': 145.67, 'change': 8.92, 'changePercent': 6.52, 'currency': '$'},
+        {'symbol': 'NFLX', 'name': 'Netflix Inc', 'price': 478.33, 'change': 18.45, 'changePercent': 4.01, 'currency': '$'},
+        {'symbol': 'META', 'name': 'Meta Platforms', 'price': 356.78, 'change': 12.34, 'changePercent': 3.58, 'currency': '$'}
+    ],
+    'losers': [
+        {'symbol': 'PYPL', 'name': 'PayPal Holdings', 'price': 62.45, 'change': -4.23, 'changePercent': -6.34, 'currency': '$'},
+        {'symbol': 'SNAP', 'name': 'Snap Inc', 'price': 11.23, 'change': -0.78, 'changePercent': -6.49, 'currency': '$'},
+        {'symbol': 'UBER', 'name': 'Uber Technologies', 'price': 58.92, 'change': -2.34, 'changePercent': -3.82, 'currency': '$'}
+    ],
+    'currencies': {
+        'usdInr': {'pair': 'USD/INR', 'rate': '83.15', 'change': 0.2, 'symbol': '₹'},
+        'eurInr': {'pair': 'EUR/INR', 'rate': '90.45', 'change': -0.1, 'symbol': '₹'},
+        'gbpInr': {'pair': 'GBP/INR', 'rate': '102.30', 'change': 0.3, 'symbol': '₹'}
+    }
+}
+
+
+def create_http_upstream(finnhub_key: str) -> HttpMarketUpstream:
+    """Upstream with a pooled keep-alive client (close with upstream.client.aclose())"""
+    client = httpx.AsyncClient(
+        timeout=httpx.Timeout(5.0),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+    )
+    return HttpMarketUpstream(client, finnhub_key)
@@ -0,0 +1,318 @@
+import asyncio
+import html
+import re
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+# ============================================
+# TEXT CLEANING (once, at ingest)
+# ============================================
+_TAG_RE = re.compile(r'<[^>]*>')
+_SPACE_RE = re.compile(r'\s+')
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+def clean_text(text: Optional[str], limit: int = 200) -> str:
+    """Strips HTML and entities, collapses whitespace, truncates to limit chars"""
+    if not text:
+        return ''
+    cleaned = _SPACE_RE.sub(' ', html.unescape(_TAG_RE.sub('', text))).strip()
+    if len(cleaned) > limit:
+        cleaned = cleaned[:limit - 3] + '...'
+    return cleaned
+
+
+# ============================================
+# MINHASH / LSH
+# ============================================
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS          # collision threshold ~ (1/BANDS) ** (1/ROWS) = 0.5
+DUPLICATE_SIMILARITY = 0.6        # estimated Jaccard needed to merge into a cluster
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(1729)
+_PERM_A = _rng.integers(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str, k: int = 3) -> np.ndarray:
+    """crc32 of every k-word shingle (falls back to single words for short text)"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) >= k:
+        grams = {' '.join(words[i:i + k]) for i in range(len(words) - k + 1)}
+    else:
+        grams = set(words) or {text}
+    return np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(text: str) -> np.ndarray:
+    """NUM_PERM-wide MinHash signature, all permutations in one broadcast"""
+    hashes = shingles(text)
+    return ((_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _MERSENNE).min(axis=1)
+
+
+def band_keys(signature: np.ndarray) -> List[bytes]:
+    bands = signature.reshape(BANDS, ROWS)
+    return [bytes([i]) + band.tobytes() for i, band in enumerate(bands)]
+
+
+# ============================================
+# ARTICLES
+# ============================================
+@dataclass(slots=True)
+class Article:
+    id: int
+    category: str
+    datetime: int
+    headline: str
+    summary: str
+    source: str
+    url: str
+    image: str = ''
+    related: str = ''
+    signature: Optional[np.ndarray] = None
+    cluster: int = 0                        # id of the cluster's first article
+    sources: List[str] = field(default_factory=list)
+    urls: List[str] = field(default_factory=list)  # every URL merged into this cluster
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'category': self.category,
+            'datetime': self.datetime,
+            'headline': self.headline,
+            'summary': self.summary,
+            'source': self.source,
+            'url': self.url,
+            'image': self.image,
+            'related': self.related,
+            'sources': self.sources
+        }
+
+
+# ============================================
+# STORE
+# ============================================
+class NewsStore:
+    """
+    Bounded article store with near-duplicate clustering.
+
+    Articles are cleaned and MinHashed once on ingest. LSH buckets (scoped
+    per category) find candidate duplicates; a match joins the existing
+    cluster instead of being listed again. The oldest articles are evicted
+    past max_articles. Per-category pages are served from indexes rebuilt
+    once per ingest, not per request.
+    """
+
+    def __init__(self, max_articles: int = 2000):
+        self.max_articles = max_articles
+        self._articles: "OrderedDict[int, Article]" = OrderedDict()
+        self._urls: Dict[str, int] = {}
+        self._buckets: Dict[Tuple[str, bytes], int] = {}
+        self._index: Dict[str, List[Dict[str, Any]]] = {}
+        self._next_id = 1
+        self.updated_at: Optional[float] = None
+
+    def add(self, category: str, headline: str, summary: str, source: str, url: str,
+            published: int, image: str = '', related: str = '') -> bool:
+        """Adds one raw item; returns False if it was an exact or near duplicate"""
+        if url and url in self._urls:
+            return False
+
+        article = Article(
+            id=self._next_id, category=category, datetime=published,
+            headline=clean_text(headline), summary=clean_text(summary),
+            source=source, url=url, image=image or '', related=related or ''
+        )
+        if not article.headline:
+            return False
+        self._next_id += 1
+        article.signature = minhash(f"{article.headline} {article.summary}")
+        keys = [(category, key) for key in band_keys(article.signature)]
+
+        for key in keys:
+            cluster_id = self._buckets.get(key)
+            representative = self._articles.get(cluster_id) if cluster_id else None
+            if representative is None:
+                continue
+            similarity = float(np.mean(representative.signature == article.signature))
+            if similarity >= DUPLICATE_SIMILARITY:
+                if source not in representative.sources:
+                    representative.sources.append(source)
+                if url:
+                    self._urls[url] = representative.id
+                    representative.urls.append(url)
+                return False
+
+        article.cluster = article.id
+        article.sources = [source]
+        self._articles[article.id] = article
+        if url:
+            self._urls[url] = article.id
+            article.urls.append(url)
+        for key in keys:
+            self._buckets.setdefault(key, article.id)
+        self._evict()
+        return True
+
+    def _evict(self) -> None:
+        while len(self._articles) > self.max_articles:
+            _, old = self._articles.popitem(last=False)
+            for key in band_keys(old.signature):
+                if self._buckets.get((old.category, key)) == old.id:
+                    del self._buckets[(old.category, key)]
+            for url in old.urls:
+                self._urls.pop(url, None)
+
+    def rebuild_index(self) -> None:
+        by_category: Dict[str, List[Article]] = {}
+        for article in self._articles.values():
+            by_category.setdefault(article.category, []).append(article)
+        self._index = {
+            category: [a.to_dict() for a in sorted(items, key=lambda a: a.datetime, reverse=True)]
+            for category, items in by_category.items()
+        }
+        self.updated_at = time.time()
+
+    def page(self, category: str, page: int, page_size: int) -> Dict[str, Any]:
+        items = self._index.get(category, [])
+        start = (page - 1) * page_size
+        return {
+            'category': category,
+            'page': page,
+            'page_size': page_size,
+            'total': len(items),
+            'updated_at': self.updated_at,
+            'items': items[start:start + page_size]
+        }
+
+
+# ============================================
+# FEEDS
+# ============================================
+FINNHUB_NEWS_URL = 'https://finnhub.io/api/v1/news'
+MARKETAUX_NEWS_URL = 'https://api.marketaux.com/v1/news/all'
+
+# category -> (provider, upstream parameters)
+FEEDS = {
+    'global': ('finnhub', {'category': 'general'}),
+    'crypto': ('finnhub', {'category': 'crypto'}),
+    'merger': ('finnhub', {'category': 'merger'}),
+    'india': ('marketaux', {'countries': 'in'}),
+    'forex': ('marketaux', {'search': 'forex OR currency OR dollar OR euro OR pound OR yen '
+                                      'OR "exchange rate" OR "central bank" OR fed OR ecb'}),
+}
+
+
+class HttpNewsUpstream:
+    """Finnhub and Marketaux feeds through the shared pooled client"""
+
+    def __init__(self, client: httpx.AsyncClient, finnhub_key: str, marketaux_key: str):
+        self.client = client
+        self.finnhub_key = finnhub_key
+        self.marketaux_key = marketaux_key
+
+    async def fetch(self, category: str) -> List[Dict[str, Any]]:
+        """Raw items normalised to NewsStore.add() keyword arguments"""
+        provider, params = FEEDS[category]
+        if provider == 'finnhub':
+            response = await self.client.get(FINNHUB_NEWS_URL, params={**params, 'token': self.finnhub_key})
+            response.raise_for_status()
+            return [{
+                'headline': item.get('headline'),
+                'summary': item.get('summary'),
+                'source': item.get('source') or 'Finnhub',
+                'url': item.get('url') or '',
+                'published': int(item.get('datetime') or 0),
+                'image': item.get('image'),
+                'related': item.get('related')
+            } for item in response.json()]
+
+        response = await self.client.get(MARKETAUX_NEWS_URL, params={
+            **params, 'filter_entities': 'true', 'language': 'en', 'api_token': self.marketaux_key
+        })
+        response.raise_for_status()
+        return [{
+            'headline': item.get('title'),
+            'summary': item.get('description') or 'No summary available',
+            'source': item.get('source') or 'Marketaux',
+            'url': item.get('url') or '',
+            'published': _parse_timestamp(item.get('published_at')),
+            'image': item.get('image_url'),
+            'related': ','.join(e['symbol'] for e in (item.get('entities') or []) if e.get('symbol'))
+        } for item in response.json().get('data', []) if item.get('title') and item.get('description')]
+
+
+class StubNewsUpstream:
+    """Canned items (including cross-source duplicates) for tests and offline dev"""
+
+    async def fetch(self, category: str) -> List[Dict[str, Any]]:
+        now = int(time.time())
+        return [
+            {'headline': f'<b>Markets</b> rally as {category} sentiment improves for the week',
+             'summary': 'Stocks climbed on Tuesday &amp; investors cheered upbeat data.',
+             'source': 'Reuters', 'url': f'https://example.com/{category}/1', 'published': now - 60},
+            {'headline': f'Markets rally as {category} sentiment improves for the week ahead',
+             'summary': 'Stocks climbed on Tuesday & investors cheered upbeat data.',
+             'source': 'Bloomberg', 'url': f'https://example.com/{category}/2', 'published': now - 30},
+            {'headline': f'Central bank holds rates steady in {category} update',
+             'summary': 'Policy makers left the benchmark rate unchanged.',
+             'source': 'CNBC', 'url': f'https://example.com/{category}/3', 'published': now - 120},
+        ]
+
+
+def _parse_timestamp(value: Optional[str]) -> int:
+    if not value:
+        return 0
+    try:
+        return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+    except ValueError:
+        return 0
+
+
+# ============================================
+# SCHEDULED INGESTION
+# ============================================
+class NewsPipeline:
+    """Pulls every feed on a schedule into a NewsStore"""
+
+    def __init__(self, upstream, store: NewsStore, interval: float = 300.0):
+        self.upstream = upstream
+        self.store = store
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def ingest_once(self) -> Dict[str, int]:
+        results = await asyncio.gather(*(self.upstream.fetch(c) for c in FEEDS), return_exceptions=True)
+        added = {}
+        for category, items in zip(FEEDS, results):
+            if isinstance(items, Exception):
+                print(f"⚠️ News feed '{category}' failed: {items}")
+                continue
+            added[category] = sum(self.store.add(category, **item) for item in items)
+        self.store.rebuild_index()
+        return added
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.ingest_once()
+            except Exception as e:
+                print(f"⚠️ News ingest failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,211 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+# ============================================
+# PER-REQUEST PROFILING
+# ============================================
+PROFILE_MODES = ('cprofile', 'torch', 'all')
+PROFILE_SUFFIXES = ('.prof', '.torch.txt', '.trace.json')
+
+_NO_PROFILE = nullcontext()
+
+
+class RequestProfiler:
+    """
+    Opt-in profiling of single requests.
+
+    Disabled by default; while disabled, capture() and torch_ops() return a
+    shared no-op context so the hot path pays one attribute check.
+
+    - 'cprofile' writes <id>.prof (open with snakeviz / pstats)
+    - 'torch'    writes <id>.torch.txt (operator table for the model forward)
+                 and <id>.trace.json (chrome://tracing)
+    - 'all'      both
+
+    One capture runs at a time (two cProfile profilers can't be active at
+    once); a request arriving during a capture is served unprofiled. Only
+    the newest `keep` captures are kept on disk.
+    """
+
+    def __init__(self, output_dir: str, enabled: bool = False, keep: int = 50):
+        self.output_dir = output_dir
+        self.enabled = enabled
+        self.keep = keep
+        self._local = threading.local()
+        self._recent: List[str] = []
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()     # held for the length of a capture
+
+    def capture(self, mode: Optional[str]):
+        if not self.enabled or mode not in PROFILE_MODES:
+            return _NO_PROFILE
+        return self._capture(mode)
+
+    @contextmanager
+    def _capture(self, mode: str):
+        if not self._busy.acquire(blocking=False):
+            print("⚠️ Profile capture already running - serving this request unprofiled")
+            yield None
+            return
+        try:
+            with self._profiled(mode) as profile_id:
+                yield profile_id
+        finally:
+            self._busy.release()
+
+    @contextmanager
+    def _profiled(self, mode: str):
+        os.makedirs(self.output_dir, exist_ok=True)
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        profile = cProfile.Profile() if mode in ('cprofile', 'all') else None
+
+        self._local.capture_id = profile_id
+        self._local.torch_profile_id = profile_id if mode in ('torch', 'all') else None
+        if profile is not None:
+            profile.enable()
+        try:
+            yield profile_id
+        finally:
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(os.path.join(self.output_dir, f"{profile_id}.prof"))
+            self._local.capture_id = None
+            self._local.torch_profile_id = None
+            self._remember(profile_id)
+
+    def capturing(self) -> bool:
+        """True while this thread's request is being profiled (any mode)"""
+        return getattr(self._local, 'capture_id', None) is not None
+
+    def torch_ops(self):
+        """Wrap the model forward; records torch operator timings when requested"""
+        profile_id = getattr(self._local, 'torch_profile_id', None)
+        if profile_id is None:
+            return _NO_PROFILE
+        return self._torch_ops(profile_id)
+
+    @contextmanager
+    def _torch_ops(self, profile_id: str):
+        from torch.profiler import ProfilerActivity, profile
+
+        with profile(activities=[ProfilerActivity.CPU], record_shapes=True) as prof:
+            yield
+        table = prof.key_averages().table(sort_by="self_cpu_time_total", row_limit=40)
+        with open(os.path.join(self.output_dir, f"{profile_id}.torch.txt"), 'w') as f:
+            f.write(table)
+        prof.export_chrome_trace(os.path.join(self.output_dir, f"{profile_id}.trace.json"))
+
+    def _remember(self, profile_id: str) -> None:
+        with self._lock:
+            self._recent.append(profile_id)
+            del self._recent[:-self.keep]
+        self._prune()
+
+    def _prune(self) -> None:
+        """Deletes capture files beyond the newest `keep` (ids sort by time)"""
+        ids = set()
+        for name in os.listdir(self.output_dir):
+            for suffix in PROFILE_SUFFIXES:
+                if name.endswith(suffix):
+                    ids.add(name[:-len(suffix)])
+        for old_id in sorted(ids)[:-self.keep]:
+            for suffix in PROFILE_SUFFIXES:
+                try:
+                    os.remove(os.path.join(self.output_dir, old_id + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def recent(self) -> List[str]:
+        with self._lock:
+            return list(self._recent)
+
+
+# ============================================
+# CONTINUOUS SAMPLING (FLAME GRAPHS)
+# ============================================
+class StackSampler:
+    """
+    Low-rate sampling profiler for every Python thread.
+
+    Aggregates stacks in memory and periodically rewrites output_path in the
+    collapsed-stack format ("frame;frame;frame count") that flamegraph.pl,
+    speedscope and inferno read directly. Nothing runs until start().
+    """
+
+    def __init__(self, output_path: str, hz: float = 10.0, flush_every: float = 60.0):
+        self.output_path = output_path
+        self.interval = 1.0 / hz
+        self.flush_every = flush_every
+        self._counts: Counter = Counter()
+        self._counts_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        last_flush = time.monotonic()
+        while not self._stop.wait(self.interval):
+            stacks = [_collapse(frame) for thread_id, frame in sys._current_frames().items()
+                      if thread_id != own_id]
+            with self._counts_lock:
+                self._counts.update(stacks)
+            if time.monotonic() - last_flush >= self.flush_every:
+                self.flush()
+                last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        with self._counts_lock:
+            lines = [f"{stack} {count}\n" for stack, count in self._counts.items()]
+        directory = os.path.dirname(self.output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.output_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.writelines(lines)
+        os.replace(tmp_path, self.output_path)
+
+    def status(self) -> Dict[str, object]:
+        with self._counts_lock:
+            unique_stacks, samples = len(self._counts), sum(self._counts.values())
+        return {
+            'running': self.running,
+            'hz': round(1.0 / self.interval, 2),
+            'unique_stacks': unique_stacks,
+            'samples': samples,
+            'output_path': self.output_path
+        }
+
+
+def _collapse(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    stack.reverse()
+    return ';'.join(stack)
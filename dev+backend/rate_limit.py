@@ -0,0 +1,139 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import redis
+except ImportError:  # only needed for the shared multi-worker backend
+    redis = None
+
+# ============================================
+# ERRORS
+# ============================================
+class RateLimited(Exception):
+    """Request rejected; retry_after is in seconds"""
+
+    def __init__(self, retry_after: float, scope: str, status_code: int = 429):
+        super().__init__(f"Rate limit exceeded ({scope})")
+        self.retry_after = retry_after
+        self.scope = scope
+        self.status_code = status_code
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+# ============================================
+# BUCKET BACKENDS
+# ============================================
+class LocalBuckets:
+    """
+    In-process token buckets in a bounded LRU.
+
+    Each bucket is a two-item list [tokens, last_refill]; the least recently
+    seen key is evicted once max_keys is reached (an evicted client simply
+    starts again with a full bucket).
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float) -> float:
+        """Takes one token; returns 0.0 if allowed, else seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[key] = [burst, now]
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return 0.0
+            return (1.0 - bucket[0]) / rate
+
+
+# Same algorithm as LocalBuckets, run atomically inside Redis with the
+# server clock so every worker shares one view of each bucket.
+_REDIS_TAKE = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local retry = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(retry)
+"""
+
+class RedisBuckets:
+    """Shared token buckets for multi-worker deployments (needs the redis package)"""
+
+    def __init__(self, client, key_prefix: str = "ratelimit:"):
+        self._client = client
+        self._prefix = key_prefix
+        self._take = client.register_script(_REDIS_TAKE)
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisBuckets":
+        if redis is None:
+            raise RuntimeError("RedisBuckets requires the 'redis' package")
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def take(self, key: str, rate: float, burst: float) -> float:
+        return float(self._take(keys=[self._prefix + key], args=[rate, burst]))
+
+
+# ============================================
+# LIMITERS
+# ============================================
+class RateLimiter:
+    """rate requests/second per key, with bursts of up to burst requests"""
+
+    def __init__(self, name: str, rate: float, burst: float, backend=None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.backend = backend if backend is not None else LocalBuckets()
+
+    def check(self, key: str) -> None:
+        retry_after = self.backend.take(f"{self.name}:{key}", self.rate, self.burst)
+        if retry_after:
+            raise RateLimited(retry_after, self.name)
+
+
+class ConcurrencyLimit:
+    """Caps concurrent work (model inference); excess is rejected, not queued"""
+
+    def __init__(self, limit: int, retry_after: float = 1.0):
+        self.limit = limit
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(limit)
+
+    @contextmanager
+    def slot(self):
+        if not self._slots.acquire(blocking=False):
+            raise RateLimited(self.retry_after, "inference", status_code=503)
+        try:
+            yield
+        finally:
+            self._slots.release()
@@ -0,0 +1,404 @@
+"""
+Incremental retraining of the intent model (CPU).
+
+    python retrain.py --labels new_rows.csv
+    python retrain.py --export-unlabelled to_label.csv
+
+Labelled rows come from --labels CSVs (sentence,sub_intent[,intent]) and
+from fallback_log.txt lines written as "text<TAB>sub_intent". They are
+deduplicated and merged into the dataset the current checkpoint was
+trained on, and only rows that are new or relabelled, plus a replay
+sample of old rows, are trained on. Each run writes
+models/intent-vN/ (model, tokenizer, labels.json, dataset.csv,
+manifest.json), which the server loads with MODEL_PATH=models/intent-vN.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+MAX_LENGTH = 32   # same truncation as predict_intent in app.py
+
+_SPACE_RE = re.compile(r'\s+')
+_VERSION_RE = re.compile(r'intent-v(\d+)$')
+
+
+def normalize(text) -> str:
+    return _SPACE_RE.sub(' ', str(text)).strip()
+
+
+def dedupe_key(text: str) -> str:
+    return normalize(text).lower()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(normalize(text).encode('utf-8')).hexdigest()
+
+
+# ============================================
+# DATASETS
+# ============================================
+def read_dataset(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    df['sentence'] = df['sentence'].map(normalize)
+    return df[['sentence', 'intent', 'sub_intent']]
+
+
+def read_labels(path: str) -> pd.DataFrame:
+    """CSV with sentence and sub_intent columns (intent optional)"""
+    df = pd.read_csv(path)
+    missing = {'sentence', 'sub_intent'} - set(df.columns)
+    if missing:
+        raise SystemExit(f"❌ {path} is missing columns: {', '.join(sorted(missing))}")
+    df = df.dropna(subset=['sentence', 'sub_intent'])
+    df['sentence'] = df['sentence'].map(normalize)
+    return df[[c for c in ('sentence', 'intent', 'sub_intent') if c in df.columns]]
+
+
+def read_fallback_log(path: str) -> Tuple[pd.DataFrame, List[str]]:
+    """Labelled rows ("text<TAB>sub_intent") and the remaining unlabelled texts"""
+    labelled, unlabelled = [], []
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=['sentence', 'sub_intent']), unlabelled
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            text, _, label = line.rstrip('\n').partition('\t')
+            text, label = normalize(text), label.strip()
+            if not text:
+                continue
+            if label:
+                labelled.append({'sentence': text, 'sub_intent': label})
+            else:
+                unlabelled.append(text)
+    return pd.DataFrame(labelled, columns=['sentence', 'sub_intent']), unlabelled
+
+
+def merge_rows(base: pd.DataFrame, new: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, int]:
+    """
+    Merges labelled rows into the base dataset. Texts are compared case- and
+    whitespace-insensitively; a new row replaces a base row with the same
+    text. Returns (merged, fresh rows that changed the dataset, relabelled count).
+    """
+    new = new.copy()
+    if 'intent' not in new.columns:
+        new['intent'] = None
+    intent_of = dict(zip(base['sub_intent'], base['intent']))
+    intent_of.update((s, i) for s, i in zip(new['sub_intent'], new['intent']) if isinstance(i, str) and i)
+    new['intent'] = [i if isinstance(i, str) and i else intent_of.get(s)
+                     for i, s in zip(new['intent'], new['sub_intent'])]
+    unknown = sorted(set(new.loc[new['intent'].isna(), 'sub_intent']))
+    if unknown:
+        raise SystemExit(f"❌ New sub_intents need an 'intent' column: {', '.join(unknown)}")
+
+    base = base.assign(key=base['sentence'].map(dedupe_key)).drop_duplicates('key', keep='last')
+    new = new.assign(key=new['sentence'].map(dedupe_key)).drop_duplicates('key', keep='last')
+
+    base_labels = dict(zip(base['key'], base['sub_intent']))
+    fresh = new[[base_labels.get(k) != s for k, s in zip(new['key'], new['sub_intent'])]]
+    relabelled = int(fresh['key'].isin(base_labels.keys()).sum())
+
+    merged = pd.concat([base[~base['key'].isin(fresh['key'])], fresh], ignore_index=True)
+    columns = ['sentence', 'intent', 'sub_intent']
+    return merged[columns], fresh[columns].reset_index(drop=True), relabelled
+
+
+# ============================================
+# TOKEN CACHE (memory-mapped)
+# ============================================
+def tokenizer_fingerprint(tokenizer, max_length: int = MAX_LENGTH) -> str:
+    """Stable across save_pretrained() round trips, so every version shares one cache"""
+    settings = [type(tokenizer).__name__, max_length, getattr(tokenizer, 'do_lower_case', None)]
+    digest = hashlib.sha256(json.dumps(settings).encode())
+    digest.update(json.dumps(sorted(tokenizer.get_vocab().items())).encode())
+    return digest.hexdigest()[:16]
+
+
+class TokenCache:
+    """
+    Tokenized sentences in .npy shards opened with mmap_mode='r', keyed by
+    text hash. A run tokenizes only texts it has not seen before and appends
+    them as one new shard. A different tokenizer or max_length gets its
+    own directory.
+    """
+
+    def __init__(self, root: str, tokenizer, fingerprint: str, max_length: int = MAX_LENGTH):
+        self.dir = os.path.join(root, fingerprint)
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        os.makedirs(self.dir, exist_ok=True)
+        self._index_path = os.path.join(self.dir, 'index.json')
+        self.index: Dict[str, List[int]] = {}
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as f:
+                self.index = json.load(f)
+        self._shards: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _paths(self, shard: int) -> Tuple[str, str]:
+        return (os.path.join(self.dir, f'ids-{shard:05d}.npy'),
+                os.path.join(self.dir, f'mask-{shard:05d}.npy'))
+
+    def _shard(self, shard: int) -> Tuple[np.ndarray, np.ndarray]:
+        if shard not in self._shards:
+            ids_path, mask_path = self._paths(shard)
+            self._shards[shard] = (np.load(ids_path, mmap_mode='r'), np.load(mask_path, mmap_mode='r'))
+        return self._shards[shard]
+
+    def add(self, texts: List[str]) -> int:
+        """Tokenizes uncached texts; returns how many were new"""
+        missing = list(dict.fromkeys(t for t in texts if text_hash(t) not in self.index))
+        if not missing:
+            return 0
+        encoded = self.tokenizer(missing, truncation=True, padding='max_length', max_length=self.max_length)
+        shard = len(glob.glob(os.path.join(self.dir, 'ids-*.npy')))
+        ids_path, mask_path = self._paths(shard)
+        np.save(ids_path, np.asarray(encoded['input_ids'], dtype=np.int32))
+        np.save(mask_path, np.asarray(encoded['attention_mask'], dtype=np.int8))
+
+        for row, text in enumerate(missing):
+            self.index[text_hash(text)] = [shard, row]
+        tmp_path = self._index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self._index_path)
+        return len(missing)
+
+    def arrays(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(input_ids, attention_mask) as int64 arrays, one row per text"""
+        ids = np.empty((len(texts), self.max_length), dtype=np.int64)
+        mask = np.empty((len(texts), self.max_length), dtype=np.int64)
+        locations = np.array([self.index[text_hash(t)] for t in texts]).reshape(-1, 2)
+        for shard in np.unique(locations[:, 0]):
+            out_rows = np.flatnonzero(locations[:, 0] == shard)
+            shard_ids, shard_mask = self._shard(int(shard))
+            ids[out_rows] = shard_ids[locations[out_rows, 1]]
+            mask[out_rows] = shard_mask[locations[out_rows, 1]]
+        return ids, mask
+
+
+# ============================================
+# MODEL
+# ============================================
+def checkpoint_labels(checkpoint: str, dataset_path: str) -> List[str]:
+    """Label order of a checkpoint: labels.json, else LabelEncoder order of the dataset"""
+    labels_path = os.path.join(checkpoint, 'labels.json')
+    if os.path.exists(labels_path):
+        with open(labels_path) as f:
+            return json.load(f)
+    return sorted(pd.read_csv(dataset_path)['sub_intent'].unique())
+
+
+def resize_head(model, old_labels: List[str], new_labels: List[str]):
+    """Reorders/extends the classifier; known labels keep their trained weights"""
+    import torch
+
+    if list(old_labels) == list(new_labels):
+        return model
+    old_head = model.classifier
+    new_head = torch.nn.Linear(old_head.in_features, len(new_labels))
+    old_index = {label: i for i, label in enumerate(old_labels)}
+    with torch.no_grad():
+        for i, label in enumerate(new_labels):
+            if label in old_index:
+                new_head.weight[i] = old_head.weight[old_index[label]]
+                new_head.bias[i] = old_head.bias[old_index[label]]
+    model.classifier = new_head
+    model.num_labels = len(new_labels)
+    model.config.num_labels = len(new_labels)
+    model.config.id2label = dict(enumerate(new_labels))
+    model.config.label2id = {label: i for i, label in enumerate(new_labels)}
+    return model
+
+
+def fine_tune(model, ids: np.ndarray, mask: np.ndarray, labels: np.ndarray,
+              epochs: int, batch_size: int, lr: float, seed: int) -> List[float]:
+    """Plain AdamW loop; batches are trimmed to their longest sequence"""
+    import torch
+
+    torch.manual_seed(seed)
+    rng = np.random.default_rng(seed)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=lr)
+    losses = []
+    model.train()
+    for epoch in range(epochs):
+        order = rng.permutation(len(labels))
+        total = 0.0
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            width = int(mask[batch].sum(axis=1).max())
+            outputs = model(input_ids=torch.from_numpy(ids[batch, :width]),
+                            attention_mask=torch.from_numpy(mask[batch, :width]),
+                            labels=torch.from_numpy(labels[batch]))
+            outputs.loss.backward()
+            optimizer.step()
+            optimizer.zero_grad()
+            total += outputs.loss.item() * len(batch)
+        losses.append(total / len(labels))
+        print(f"  epoch {epoch + 1}/{epochs}: loss {losses[-1]:.4f}")
+    model.eval()
+    return losses
+
+
+def accuracy(model, ids: np.ndarray, mask: np.ndarray, labels: np.ndarray, batch_size: int = 64) -> Optional[float]:
+    import torch
+
+    if len(labels) == 0:
+        return None
+    correct = 0
+    with torch.no_grad():
+        for start in range(0, len(labels), batch_size):
+            batch = slice(start, start + batch_size)
+            width = int(mask[batch].sum(axis=1).max())
+            logits = model(input_ids=torch.from_numpy(ids[batch, :width]),
+                           attention_mask=torch.from_numpy(mask[batch, :width])).logits
+            correct += int((logits.argmax(dim=1).numpy() == labels[batch]).sum())
+    return round(correct / len(labels), 4)
+
+
+# ============================================
+# ARTIFACTS
+# ============================================
+def latest_artifact(models_dir: str) -> Optional[str]:
+    versions = [(int(m.group(1)), path) for path in glob.glob(os.path.join(models_dir, 'intent-v*'))
+                if (m := _VERSION_RE.search(path)) and os.path.isdir(path)]
+    return max(versions)[1] if versions else None
+
+
+def next_version(models_dir: str) -> int:
+    latest = latest_artifact(models_dir)
+    return int(_VERSION_RE.search(latest).group(1)) + 1 if latest else 1
+
+
+def write_artifact(models_dir: str, model, tokenizer, labels: List[str],
+                   merged: pd.DataFrame, manifest: Dict) -> str:
+    """Writes to a temp dir and renames, so a half-written version is never visible"""
+    os.makedirs(models_dir, exist_ok=True)
+    path = os.path.join(models_dir, f"intent-v{manifest['version']}")
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+
+    model.save_pretrained(tmp_path, safe_serialization=False)
+    tokenizer.save_pretrained(tmp_path)
+    merged.to_csv(os.path.join(tmp_path, 'dataset.csv'), index=False)
+    with open(os.path.join(tmp_path, 'labels.json'), 'w') as f:
+        json.dump(labels, f, indent=2)
+    with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+# ============================================
+# CLI
+# ============================================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fine-tune the intent model on newly labelled rows")
+    parser.add_argument('--checkpoint', help="model to start from (default: latest artifact, else ./model)")
+    parser.add_argument('--dataset', default='./intent_dataset.csv',
+                        help="training data of ./model (artifacts carry their own dataset.csv)")
+    parser.add_argument('--fallback-log', default='./fallback_log.txt')
+    parser.add_argument('--labels', action='append', default=[], help="CSV of labelled rows (repeatable)")
+    parser.add_argument('--export-unlabelled', metavar='CSV',
+                        help="write unlabelled fallback texts for annotation and exit")
+    parser.add_argument('--models-dir', default='./models')
+    parser.add_argument('--cache-dir', default='./.token_cache')
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--lr', type=float, default=3e-5)
+    parser.add_argument('--replay', type=float, default=3.0,
+                        help="old rows replayed per new row, to avoid forgetting")
+    parser.add_argument('--threads', type=int, help="torch CPU threads")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--dry-run', action='store_true', help="merge and tokenize only")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    started = time.perf_counter()
+
+    checkpoint = args.checkpoint or latest_artifact(args.models_dir) or './model'
+    parent_dataset = os.path.join(checkpoint, 'dataset.csv')
+    base = read_dataset(parent_dataset if os.path.exists(parent_dataset) else args.dataset)
+
+    logged, unlabelled = read_fallback_log(args.fallback_log)
+    if args.export_unlabelled:
+        known = set(base['sentence'].map(dedupe_key))
+        texts = [t for t in dict.fromkeys(unlabelled) if dedupe_key(t) not in known]
+        pd.DataFrame({'sentence': texts, 'sub_intent': ''}).to_csv(args.export_unlabelled, index=False)
+        print(f"📝 Wrote {len(texts)} unlabelled texts to {args.export_unlabelled}")
+        return 0
+
+    new = pd.concat([logged] + [read_labels(p) for p in args.labels], ignore_index=True)
+    merged, fresh, relabelled = merge_rows(base, new)
+    print(f"📊 {checkpoint}: {len(base)} rows, +{len(fresh) - relabelled} new, {relabelled} relabelled "
+          f"({len(unlabelled)} unlabelled fallback lines skipped)")
+    if fresh.empty:
+        print("✅ Nothing new to train on")
+        return 0
+
+    import torch
+    from transformers import DistilBertForSequenceClassification, DistilBertTokenizerFast
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    tokenizer = DistilBertTokenizerFast.from_pretrained(checkpoint)
+    cache = TokenCache(args.cache_dir, tokenizer, tokenizer_fingerprint(tokenizer))
+    tokenized = cache.add(merged['sentence'].tolist())
+    print(f"🔤 Tokenized {tokenized} new texts ({len(merged) - tokenized} from cache)")
+    if args.dry_run:
+        return 0
+
+    old_labels = checkpoint_labels(checkpoint, args.dataset)
+    labels = sorted(merged['sub_intent'].unique())
+    label_ids = {label: i for i, label in enumerate(labels)}
+    model = resize_head(DistilBertForSequenceClassification.from_pretrained(checkpoint), old_labels, labels)
+
+    # New/relabelled rows plus a random replay sample of the rest
+    fresh_keys = set(fresh['sentence'].map(dedupe_key))
+    retained = merged[~merged['sentence'].map(dedupe_key).isin(fresh_keys)]
+    replay = retained.sample(n=min(len(retained), int(len(fresh) * args.replay)), random_state=args.seed)
+    train = pd.concat([fresh, replay], ignore_index=True)
+
+    ids, mask = cache.arrays(train['sentence'].tolist())
+    y = train['sub_intent'].map(label_ids).to_numpy(dtype=np.int64)
+    print(f"🏋️ Fine-tuning on {len(fresh)} new + {len(replay)} replayed rows (CPU)")
+    losses = fine_tune(model, ids, mask, y, args.epochs, args.batch_size, args.lr, args.seed)
+
+    fresh_ids, fresh_mask = cache.arrays(fresh['sentence'].tolist())
+    retained_ids, retained_mask = cache.arrays(retained['sentence'].tolist())
+    scores = {
+        'new': accuracy(model, fresh_ids, fresh_mask, fresh['sub_intent'].map(label_ids).to_numpy()),
+        'retained': accuracy(model, retained_ids, retained_mask, retained['sub_intent'].map(label_ids).to_numpy())
+    }
+
+    version = next_version(args.models_dir)
+    manifest = {
+        'version': version,
+        'parent': os.path.abspath(checkpoint),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'rows': {'total': len(merged), 'new': len(fresh) - relabelled,
+                 'relabelled': relabelled, 'replayed': len(replay)},
+        'labels': len(labels),
+        'epochs': args.epochs,
+        'loss': [round(l, 4) for l in losses],
+        'accuracy': scores,
+        'seconds': round(time.perf_counter() - started, 1)
+    }
+    path = write_artifact(args.models_dir, model, tokenizer, labels, merged, manifest)
+    print(f"✅ Saved {path} (accuracy new={scores['new']}, retained={scores['retained']}) "
+          f"in {manifest['seconds']}s")
+    print(f"   Serve it with: MODEL_PATH={path} uvicorn app:app")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
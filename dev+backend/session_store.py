@@ -0,0 +1,410 @@
+import asyncio
+import os
+import struct
+import threading
+import time
+import zlib
+from bisect import bisect_left
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from dialog_state import DialogState, SessionState
+
+# ============================================
+# BINARY FRAMES
+# ============================================
+# A frame is a batch of (session_id, SessionState | None) records stored as
+# columns:
+#
+#   header   magic, sequence, record count, payload length, crc32(payload)
+#   payload  vocab          uint32 count + offsets + strings, as ids (code 0 = None)
+#            state          uint8[n]   (DELETED = session removed)
+#            intent, bank   uint16[n]  vocab codes
+#            ids            uint32[n+1] byte offsets + NUL-terminated utf-8
+#            queries        uint32[n+1] byte offsets + NUL-terminated utf-8
+#
+# The log is a sequence of frames, one per flush, numbered 1, 2, 3... The
+# snapshot is a single frame sorted by session id, so it can be searched in
+# place without decoding it. Its sequence is the last log frame it
+# contains; restore skips log frames at or below it, so a crash between
+# replacing the snapshot and truncating the log can't replay stale frames.
+MAGIC = b'SES3'
+HEADER = struct.Struct('<4sQIII')
+LENGTH = struct.Struct('<I')
+DELETED = 255
+
+_STATES = list(DialogState)
+
+
+def _strings(strings: List[str]) -> bytes:
+    """uint32 offsets, then the NUL-terminated strings"""
+    encoded = [s.replace('\x00', '').encode('utf-8', 'surrogatepass') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    np.cumsum([len(b) + 1 for b in encoded], out=offsets[1:])
+    blob = b'\x00'.join(encoded) + b'\x00' if encoded else b''
+    return offsets.tobytes() + blob
+
+
+def _split(blob: memoryview, count: int) -> List[str]:
+    """The count strings of a _strings() blob"""
+    return bytes(blob).decode('utf-8', 'surrogatepass').split('\x00')[:count] if count else []
+
+
+def encode_frame(records: List[Tuple[str, Optional[SessionState]]], seq: int) -> bytes:
+    vocab: Dict[Optional[str], int] = {None: 0}
+    code = lambda value: vocab.setdefault(value, len(vocab))
+    n = len(records)
+
+    states = np.fromiter((DELETED if s is None else s.state for _, s in records), dtype=np.uint8, count=n)
+    intents = np.fromiter((0 if s is None else code(s.intent) for _, s in records), dtype='<u2', count=n)
+    banks = np.fromiter((0 if s is None else code(s.bank) for _, s in records), dtype='<u2', count=n)
+    strings = [v for v in vocab if v is not None]
+
+    payload = b''.join((
+        LENGTH.pack(len(strings)), _strings(strings),
+        states.tobytes(), intents.tobytes(), banks.tobytes(),
+        _strings([key for key, _ in records]),
+        _strings(['' if s is None else s.original_query for _, s in records]),
+    ))
+    return HEADER.pack(MAGIC, seq, n, len(payload), zlib.crc32(payload)) + payload
+
+
+class Frame:
+    """Column views over one decoded frame (no per-record work until asked)"""
+
+    def __init__(self, payload: memoryview, count: int, seq: int = 0):
+        self.count = count
+        self.seq = seq
+        (vocab_count,) = LENGTH.unpack_from(payload, 0)
+        _, vocab, offset = self._column(payload, LENGTH.size, vocab_count)
+        self.vocab = [None] + _split(vocab, vocab_count)
+
+        self.states = np.frombuffer(payload, dtype=np.uint8, count=count, offset=offset)
+        self.intents = np.frombuffer(payload, dtype='<u2', count=count, offset=offset + count)
+        self.banks = np.frombuffer(payload, dtype='<u2', count=count, offset=offset + 3 * count)
+        offset += 5 * count
+        self.id_offsets, self.ids_blob, offset = self._column(payload, offset)
+        self.query_offsets, self.queries_blob, _ = self._column(payload, offset)
+
+    def _column(self, payload: memoryview, offset: int, count: Optional[int] = None):
+        count = self.count if count is None else count
+        offsets = np.frombuffer(payload, dtype='<u4', count=count + 1, offset=offset)
+        offset += 4 * (count + 1)
+        end = offset + int(offsets[-1])
+        return offsets, payload[offset:end], end
+
+    def session_id(self, i: int) -> str:
+        start, end = int(self.id_offsets[i]), int(self.id_offsets[i + 1]) - 1
+        return bytes(self.ids_blob[start:end]).decode('utf-8', 'surrogatepass')
+
+    def session(self, i: int) -> Optional[SessionState]:
+        state = int(self.states[i])
+        if state == DELETED:
+            return None
+        start, end = int(self.query_offsets[i]), int(self.query_offsets[i + 1]) - 1
+        query = bytes(self.queries_blob[start:end])
+        return SessionState(_STATES[state], self.vocab[self.intents[i]], self.vocab[self.banks[i]],
+                            query.decode('utf-8', 'surrogatepass'))
+
+    def all_ids(self) -> List[str]:
+        return _split(self.ids_blob, self.count)
+
+    def records(self) -> Iterator[Tuple[str, Optional[SessionState]]]:
+        """Every record, decoded in bulk"""
+        queries = _split(self.queries_blob, self.count)
+        vocab, states = self.vocab, self.states.tolist()
+        sessions = map(lambda s, i, b, q: None if s == DELETED else SessionState(_STATES[s], vocab[i], vocab[b], q),
+                       states, self.intents.tolist(), self.banks.tolist(), queries)
+        return zip(self.all_ids(), sessions)
+
+    def find(self, session_id: str) -> int:
+        """Row of session_id in a sorted frame, or -1"""
+        ids = _SortedIds(self)
+        i = bisect_left(ids, session_id)
+        return i if i < self.count and ids[i] == session_id else -1
+
+
+class _SortedIds:
+    __slots__ = ('frame',)
+
+    def __init__(self, frame: Frame):
+        self.frame = frame
+
+    def __len__(self) -> int:
+        return self.frame.count
+
+    def __getitem__(self, i: int) -> str:
+        return self.frame.session_id(i)
+
+
+def read_frames(data: bytes) -> Tuple[List[Frame], int]:
+    """Every intact frame, and the byte length of that valid prefix"""
+    view = memoryview(data)
+    frames, offset = [], 0
+    while offset + HEADER.size <= len(data):
+        magic, seq, count, length, crc = HEADER.unpack_from(view, offset)
+        payload = view[offset + HEADER.size:offset + HEADER.size + length]
+        if magic != MAGIC or len(payload) != length or zlib.crc32(payload) != crc:
+            break  # torn write from a crash - everything before it is good
+        frames.append(Frame(payload, count, seq))
+        offset += HEADER.size + length
+    return frames, offset
+
+
+# ============================================
+# STORE
+# ============================================
+class SessionStore:
+    """
+    In-memory session map (same get/pop/[]= use as the old dict) persisted
+    as a snapshot plus an append-only log.
+
+    Writes only mark the session dirty. flush() runs off the request path:
+    it swaps out the dirty set (each session is written once per flush, no
+    matter how many turns it took) and appends it as one frame. When the
+    log grows past compact_ratio x the snapshot size, the live sessions are
+    rewritten as a new snapshot and the log is truncated, so the bytes
+    written per logical change stay bounded at about 1 + 1/compact_ratio.
+
+    Restore doesn't rebuild the map. The snapshot stays a sorted "cold"
+    frame, and a session is decoded from it (binary search) the first time
+    it is used. Only the log, which compaction keeps small, is replayed
+    eagerly. Those sessions, and any written since, live in the hot dict,
+    which shadows the cold frame; deletions of cold sessions are kept as
+    tombstones.
+    """
+
+    def __init__(self, directory: str, compact_ratio: float = 1.0,
+                 min_compact_bytes: int = 1 << 20, fsync: bool = True):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, 'sessions.snap')
+        self.log_path = os.path.join(directory, 'sessions.log')
+        self.compact_ratio = compact_ratio
+        self.min_compact_bytes = min_compact_bytes
+        self.fsync = fsync
+
+        self._sessions: Dict[str, SessionState] = {}
+        self._cold: Optional[Frame] = None
+        self._tombstones: Set[str] = set()
+        self._dirty: Dict[str, Optional[SessionState]] = {}
+        self._lock = threading.Lock()       # sessions, tombstones, dirty set
+        self._io_lock = threading.Lock()    # one flush/compaction at a time
+        self._task: Optional[asyncio.Task] = None
+        self._seq = 0                       # last frame sequence written
+
+        self.snapshot_bytes = 0
+        self.log_bytes = 0
+        self.restored = 0
+        self.restore_seconds: Optional[float] = None
+        self.last_flush_seconds: Optional[float] = None
+        self.compactions = 0
+
+    # --- dict interface used by the chat endpoints ---
+    def get(self, session_id: str, default: Optional[SessionState] = None) -> Optional[SessionState]:
+        session = self._sessions.get(session_id)
+        if session is None and self._cold is not None:
+            with self._lock:
+                session = self._thaw(session_id)
+        return default if session is None else session
+
+    def __getitem__(self, session_id: str) -> SessionState:
+        session = self.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
+
+    def __setitem__(self, session_id: str, session: SessionState) -> None:
+        with self._lock:
+            self._sessions[session_id] = session
+            self._tombstones.discard(session_id)
+            self._dirty[session_id] = session
+
+    def pop(self, session_id: str, default: Optional[SessionState] = None) -> Optional[SessionState]:
+        with self._lock:
+            session = self._sessions.pop(session_id, None) or self._thaw(session_id, keep=False)
+            if session is None:
+                return default
+            if self._cold is not None:
+                self._tombstones.add(session_id)
+            self._dirty[session_id] = None
+            return session
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __len__(self) -> int:
+        """Exact count; scans the cold frame's ids, so not for the request path"""
+        with self._lock:
+            count = len(self._sessions)
+            if self._cold is not None:
+                hidden = self._sessions.keys() | self._tombstones
+                count += sum(1 for i in self._cold.all_ids() if i not in hidden)
+        return count
+
+    def _thaw(self, session_id: str, keep: bool = True) -> Optional[SessionState]:
+        # Hot entry may have appeared while waiting for the lock
+        session = self._sessions.get(session_id)
+        if session is not None or self._cold is None or session_id in self._tombstones:
+            return session
+        row = self._cold.find(session_id)
+        if row < 0:
+            return None
+        session = self._cold.session(row)
+        if keep:
+            self._sessions[session_id] = session
+        return session
+
+    def _live_records(self) -> List[Tuple[str, SessionState]]:
+        with self._lock:
+            live = dict(self._sessions)
+            tombstones = set(self._tombstones)
+        if self._cold is not None:
+            for session_id, session in self._cold.records():
+                if session_id not in live and session_id not in tombstones:
+                    live[session_id] = session
+        return sorted(live.items(), key=itemgetter(0))
+
+    # --- persistence ---
+    def restore(self) -> int:
+        """Maps the snapshot and replays the log; returns the records loaded"""
+        started = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'rb') as f:
+                data = f.read()
+            frames, self.snapshot_bytes = read_frames(data)
+            if frames:
+                self._cold = frames[0]
+                self._seq = self._cold.seq
+            elif data:
+                print("⚠️ Session snapshot is corrupt - starting from the log only")
+
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as f:
+                data = f.read()
+            frames, self.log_bytes = read_frames(data)
+            if self.log_bytes < len(data):
+                with open(self.log_path, 'r+b') as f:
+                    f.truncate(self.log_bytes)
+            with self._lock:
+                for frame in frames:
+                    if frame.seq <= self._seq:
+                        continue   # already in the snapshot
+                    self._seq = frame.seq
+                    for session_id, session in frame.records():
+                        if session is None:
+                            self._sessions.pop(session_id, None)
+                            if self._cold is not None:
+                                self._tombstones.add(session_id)
+                        else:
+                            self._sessions[session_id] = session
+                            self._tombstones.discard(session_id)
+
+        self.restore_seconds = time.perf_counter() - started
+        self.restored = (self._cold.count if self._cold is not None else 0) + len(self._sessions)
+        return self.restored
+
+    def flush(self) -> int:
+        """Appends dirty sessions to the log (compacting if due); returns records written"""
+        with self._io_lock:
+            started = time.perf_counter()
+            with self._lock:
+                dirty, self._dirty = self._dirty, {}
+            if not dirty:
+                return 0
+
+            try:
+                if self.log_bytes > max(self.min_compact_bytes, self.compact_ratio * self.snapshot_bytes):
+                    self._compact()
+                else:
+                    self._append(dirty)
+            except Exception:
+                self._restore_dirty(dirty)
+                raise
+
+            self.last_flush_seconds = time.perf_counter() - started
+            return len(dirty)
+
+    def compact(self) -> None:
+        with self._io_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, {}
+            try:
+                self._compact()
+            except Exception:
+                self._restore_dirty(dirty)
+                raise
+
+    def _restore_dirty(self, dirty: Dict[str, Optional[SessionState]]) -> None:
+        # A failed write loses nothing: the batch goes back for the next
+        # flush, and anything put() since then is newer, so it wins
+        with self._lock:
+            self._dirty = {**dirty, **self._dirty}
+
+    def _append(self, dirty: Dict[str, Optional[SessionState]]) -> None:
+        frame = encode_frame(list(dirty.items()), self._seq + 1)
+        with open(self.log_path, 'ab') as f:
+            try:
+                f.write(frame)
+                self._sync(f)
+            except OSError:
+                # Cut a torn frame off, or restore would stop reading there
+                # and drop every frame appended after it
+                f.truncate(self.log_bytes)
+                raise
+        self._seq += 1
+        self.log_bytes += len(frame)
+
+    def _compact(self) -> None:
+        # Called with the dirty set already swapped out: the live records
+        # taken below include all of it, so the whole log can be dropped.
+        # Its sequence marks every log frame so far as included.
+        frame = encode_frame(self._live_records(), self._seq)
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(frame)
+            self._sync(f)
+        os.replace(tmp_path, self.snapshot_path)
+        with open(self.log_path, 'wb') as f:
+            self._sync(f)
+        self.snapshot_bytes, self.log_bytes = len(frame), 0
+        self.compactions += 1
+
+    def _sync(self, f) -> None:
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    # --- background flushing ---
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                print(f"⚠️ Session flush failed: {e}")
+
+    def start(self, interval: float = 1.0) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'restored_records': self.restored,
+            'hot_sessions': len(self._sessions),
+            'dirty': len(self._dirty),
+            'snapshot_bytes': self.snapshot_bytes,
+            'log_bytes': self.log_bytes,
+            'compactions': self.compactions,
+            'restore_ms': None if self.restore_seconds is None else round(self.restore_seconds * 1000, 1),
+            'last_flush_ms': None if self.last_flush_seconds is None else round(self.last_flush_seconds * 1000, 1)
+        }
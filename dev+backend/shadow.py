@@ -0,0 +1,158 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict
+
+import numpy as np
+
+
+def _lower_priority() -> None:
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)   # per-thread on Linux
+    except (AttributeError, OSError):
+        pass
+
+
+class ShadowEvaluator:
+    """
+    Compares a candidate intent model against the primary on live traffic.
+
+    offer() is called after the primary has answered. It samples
+    sample_rate of requests and hands them to a single background thread,
+    so the request path pays one random() and a queue put. Two budget caps
+    drop work instead of slowing anything down:
+
+    - max_pending:        sampled texts waiting for the candidate
+    - budget_ms_per_s:    candidate compute allowed per wall-clock second
+
+    On Linux the shadow thread also runs at nice 19, so it yields the CPU to
+    request threads. Primary latency is what predict_intent took for the
+    user (batching included); candidate latency is a single unbatched call.
+    """
+
+    def __init__(self, predict: Callable[[str], str], name: str, sample_rate: float = 0.1,
+                 max_pending: int = 32, budget_ms_per_s: float = 250.0,
+                 window: int = 1000, keep_disagreements: int = 50):
+        self.predict = predict
+        self.name = name
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self.budget_ms_per_s = budget_ms_per_s
+        self.window = window
+        self.keep_disagreements = keep_disagreements
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow",
+                                            initializer=_lower_priority)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._budget_second = 0
+        self._budget_spent_ms = 0.0
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = {'offered': 0, 'sampled': 0, 'compared': 0, 'agreed': 0,
+                            'dropped_queue': 0, 'dropped_budget': 0, 'errors': 0}
+            self._primary_ms: Deque[float] = deque(maxlen=self.window)
+            self._candidate_ms: Deque[float] = deque(maxlen=self.window)
+            self._confusion: Dict[str, int] = {}
+            self._disagreements: Deque[Dict[str, Any]] = deque(maxlen=self.keep_disagreements)
+            self._since = datetime.now(timezone.utc).isoformat()
+
+    def offer(self, text: str, primary_intent: str, primary_ms: float) -> None:
+        """Never blocks on the candidate; drops the sample if over budget"""
+        if self.sample_rate <= 0:
+            return
+        with self._lock:
+            self._counts['offered'] += 1
+            if random.random() >= self.sample_rate:
+                return
+            if self._pending >= self.max_pending:
+                self._counts['dropped_queue'] += 1
+                return
+            if self._over_budget():
+                self._counts['dropped_budget'] += 1
+                return
+            self._counts['sampled'] += 1
+            self._pending += 1
+        try:
+            self._executor.submit(self._compare, text, primary_intent, primary_ms)
+        except RuntimeError:   # shut down
+            with self._lock:
+                self._pending -= 1
+
+    def _over_budget(self) -> bool:
+        second = int(time.monotonic())
+        if second != self._budget_second:
+            self._budget_second, self._budget_spent_ms = second, 0.0
+        return self._budget_spent_ms >= self.budget_ms_per_s
+
+    def _compare(self, text: str, primary_intent: str, primary_ms: float) -> None:
+        started = time.perf_counter()
+        try:
+            candidate_intent = self.predict(text)
+        except Exception as e:
+            with self._lock:
+                self._pending -= 1
+                self._counts['errors'] += 1
+            print(f"⚠️ Shadow model {self.name} failed: {e}")
+            return
+        candidate_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self._pending -= 1
+            if int(time.monotonic()) == self._budget_second:
+                self._budget_spent_ms += candidate_ms
+            self._counts['compared'] += 1
+            self._primary_ms.append(primary_ms)
+            self._candidate_ms.append(candidate_ms)
+            if candidate_intent == primary_intent:
+                self._counts['agreed'] += 1
+                return
+            pair = f"{primary_intent} -> {candidate_intent}"
+            self._confusion[pair] = self._confusion.get(pair, 0) + 1
+            self._disagreements.append({
+                'text': text,
+                'primary': primary_intent,
+                'candidate': candidate_intent,
+                'at': datetime.now(timezone.utc).isoformat()
+            })
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+            primary = np.array(self._primary_ms)
+            candidate = np.array(self._candidate_ms)
+            confusion = sorted(self._confusion.items(), key=lambda kv: -kv[1])
+            disagreements = list(self._disagreements)
+            pending, since = self._pending, self._since
+
+        latency = None
+        if len(primary):
+            latency = {
+                'primary_p50_ms': round(float(np.percentile(primary, 50)), 2),
+                'primary_p99_ms': round(float(np.percentile(primary, 99)), 2),
+                'candidate_p50_ms': round(float(np.percentile(candidate, 50)), 2),
+                'candidate_p99_ms': round(float(np.percentile(candidate, 99)), 2),
+                'mean_delta_ms': round(float(np.mean(candidate - primary)), 2)
+            }
+        return {
+            'candidate': self.name,
+            'sample_rate': self.sample_rate,
+            'max_pending': self.max_pending,
+            'budget_ms_per_s': self.budget_ms_per_s,
+            'since': since,
+            'pending': pending,
+            **counts,
+            'agreement_rate': round(counts['agreed'] / counts['compared'], 4) if counts['compared'] else None,
+            'latency': latency,
+            'top_disagreements': [{'pair': pair, 'count': n} for pair, n in confusion[:10]],
+            'recent_disagreements': disagreements[::-1]
+        }
+
+    def close(self) -> None:
+        self.sample_rate = 0
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,71 @@
+import numpy as np
+from hypothesis import given, settings, strategies as st
+
+from chart_store import Series, lttb
+
+
+def original_lttb(x, y, threshold):
+    """Textbook LTTB, one point at a time"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    every = (n - 2) / (threshold - 2)
+    keep, a = [0], 0
+    for i in range(threshold - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        nxt_lo, nxt_hi = hi, min(int((i + 2) * every) + 1, n - 1)
+        if i == threshold - 3:
+            hi, nxt_lo, nxt_hi = n - 1, n - 1, n
+        avg_x = sum(x[nxt_lo:nxt_hi]) / (nxt_hi - nxt_lo)
+        avg_y = sum(y[nxt_lo:nxt_hi]) / (nxt_hi - nxt_lo)
+        areas = [abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a])) for j in range(lo, hi)]
+        a = lo + int(np.argmax(areas))
+        keep.append(a)
+    keep.append(n - 1)
+    return keep
+
+
+@st.composite
+def series(draw):
+    n = draw(st.integers(4, 600))
+    closes = draw(st.lists(st.floats(1, 1e5), min_size=n, max_size=n))
+    width = draw(st.integers(3, n - 1))
+    return np.arange(n, dtype=np.int64) * 300, np.array(closes), width
+
+
+@settings(max_examples=300)
+@given(series())
+def test_keeps_endpoints_and_returns_width_points(data):
+    x, y, width = data
+    keep = lttb(x, y, width)
+    assert len(keep) == width
+    assert keep[0] == 0 and keep[-1] == len(x) - 1
+    assert np.all(np.diff(keep) > 0)
+
+
+@settings(max_examples=300)
+@given(series())
+def test_matches_textbook_lttb(data):
+    x, y, width = data
+    assert lttb(x, y, width).tolist() == original_lttb(x.tolist(), y.tolist(), width)
+
+
+def test_short_series_is_returned_whole():
+    x, y = np.arange(10), np.ones(10)
+    assert lttb(x, y, 10).tolist() == list(range(10))
+    assert lttb(x, y, 50).tolist() == list(range(10))
+
+
+def test_spike_survives_downsampling():
+    y = np.ones(1000)
+    y[637] = 50.0
+    assert 637 in lttb(np.arange(1000), y, 25)
+
+
+def test_series_updates_forming_candle_and_appends_newer():
+    s = Series(capacity=2)
+    assert s.extend([100, 200], [1.0, 2.0]) == 2
+    assert s.extend([100, 200, 300, 400], [9.0, 2.5, 3.0, 4.0]) == 2
+    timestamps, closes = s.since(200)
+    assert timestamps.tolist() == [200, 300, 400]
+    assert closes.tolist() == [2.5, 3.0, 4.0]
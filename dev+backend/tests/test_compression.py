@@ -0,0 +1,95 @@
+import gzip
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import compression
+from compression import CompressionMiddleware, choose_encoding
+
+BIG = {'items': ['a fairly repetitive line of text'] * 100}
+
+
+def big_json(request):
+    return JSONResponse(BIG)
+
+
+def small_json(request):
+    return JSONResponse({'ok': True})
+
+
+def image(request):
+    return Response(b'\x89PNG' + bytes(4000), media_type='image/png')
+
+
+def precompressed(request):
+    body = gzip.compress(b'x' * 4000)
+    return Response(body, media_type='text/plain', headers={'content-encoding': 'gzip'})
+
+
+def stream(request):
+    async def chunks():
+        for _ in range(5):
+            yield 'data: ' + 'y' * 1000 + '\n\n'
+    return StreamingResponse(chunks(), media_type='text/event-stream')
+
+
+def text(request):
+    return PlainTextResponse('z' * 2000)
+
+
+@pytest.fixture
+def client():
+    app = Starlette(routes=[Route(path, view) for path, view in (
+        ('/big', big_json), ('/small', small_json), ('/image', image),
+        ('/pre', precompressed), ('/stream', stream), ('/text', text))])
+    return TestClient(CompressionMiddleware(app, minimum_size=500))
+
+
+def get(client, path, accept='gzip'):
+    return client.get(path, headers={'accept-encoding': accept})
+
+
+@pytest.mark.parametrize('path', ['/big', '/text'])
+def test_large_text_is_gzipped(client, path):
+    r = get(client, path)
+    assert r.headers['content-encoding'] == 'gzip'
+    assert r.headers['vary'] == 'Accept-Encoding'
+    assert int(r.headers['content-length']) < len(r.content)   # httpx decoded it
+
+
+def test_body_survives_compression(client):
+    assert get(client, '/big').json() == BIG
+
+
+@pytest.mark.parametrize('path', ['/small', '/image', '/stream'])
+def test_small_binary_and_streaming_pass_through(client, path):
+    r = get(client, path)
+    assert 'content-encoding' not in r.headers
+    assert 'vary' not in r.headers
+
+
+def test_existing_encoding_is_not_compressed_twice(client):
+    r = get(client, '/pre')
+    assert r.headers['content-encoding'] == 'gzip'
+    assert r.content == b'x' * 4000
+
+
+@pytest.mark.parametrize('accept', ['', 'identity', 'gzip;q=0', 'deflate'])
+def test_no_acceptable_encoding_passes_through(client, accept):
+    assert 'content-encoding' not in get(client, '/big', accept).headers
+
+
+def test_negotiation(monkeypatch):
+    monkeypatch.setattr(compression, 'SUPPORTED_ENCODINGS', ('br', 'gzip'))
+    assert choose_encoding('gzip, deflate, br') == 'br'           # br wins ties
+    assert choose_encoding('br;q=0.5, gzip;q=0.8') == 'gzip'
+    assert choose_encoding('*') == 'br'
+    assert choose_encoding('*;q=0.1, br;q=0') == 'gzip'
+    assert choose_encoding('br;q=junk, GZIP') == 'gzip'
+    assert choose_encoding('identity') is None
+
+    monkeypatch.setattr(compression, 'SUPPORTED_ENCODINGS', ('gzip',))
+    assert choose_encoding('br') is None
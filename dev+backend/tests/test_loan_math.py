@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from loan_math import (FOIR, HIGH_RISK, INTEREST_RATE_ANNUAL, LTV_RATIO, RISK_BANDS, TENURE_MONTHS,
+                       annuity_factor, loan_eligibility, loan_eligibility_batch,
+                       loan_eligibility_exact)
+
+PAISA = 0.01
+AMOUNTS = ('eligible_loan_amount', 'monthly_emi', 'total_monthly_obligation', 'max_ltv_amount')
+
+
+def original_eligibility(monthly_income, existing_emi, property_value):
+    """calculate_loan_eligibility as it was in app.py, unrounded"""
+    r = INTEREST_RATE_ANNUAL / 12 / 100
+    n = TENURE_MONTHS
+    max_new_emi = max(monthly_income * FOIR - existing_emi, 0)
+    if max_new_emi > 0:
+        eligible = max_new_emi * (((1 + r) ** n - 1) / (r * (1 + r) ** n))
+    else:
+        eligible = 0
+    max_ltv = property_value * LTV_RATIO
+    eligible = min(eligible, max_ltv)
+    emi = (eligible * r * (1 + r) ** n) / ((1 + r) ** n - 1) if eligible > 0 else 0
+    total = existing_emi + emi
+    return {
+        'eligible_loan_amount': eligible,
+        'monthly_emi': emi,
+        'total_monthly_obligation': total,
+        'debt_to_income_ratio': total / monthly_income * 100,
+        'max_ltv_amount': max_ltv
+    }
+
+
+def near_band_limit(dti: float) -> bool:
+    return any(abs(dti - limit) < 1e-6 for limit, _ in RISK_BANDS)
+
+
+# Money as whole paise: ₹1,000 - ₹1 crore income, EMIs up to ₹50 lakh, property up to ₹100 crore
+paise = lambda lo, hi: st.integers(lo, hi).map(lambda p: p / 100)
+incomes = paise(100_000, 10 ** 9)
+emis = paise(0, 5 * 10 ** 8)
+properties = paise(10 ** 6, 10 ** 11)
+
+
+@settings(max_examples=500)
+@given(incomes, emis, properties)
+def test_float_path_matches_original_formula(income, existing, value):
+    new = loan_eligibility(income, existing, value)
+    old = original_eligibility(income, existing, value)
+    for key in AMOUNTS + ('debt_to_income_ratio',):
+        assert new[key] == pytest.approx(round(old[key], 2), rel=1e-12, abs=PAISA * 1.001), key
+    if not near_band_limit(old['debt_to_income_ratio']):
+        band = next((label for limit, label in RISK_BANDS if old['debt_to_income_ratio'] <= limit), HIGH_RISK)
+        assert new['recommendation'] == band
+
+
+@settings(max_examples=500)
+@given(st.integers(1_000, 10 ** 7).map(float), emis, properties)
+def test_exact_path_within_a_paisa_of_float(income, existing, value):
+    # Whole-rupee incomes keep the affordable EMI (income x 50% - EMIs) a whole paisa
+    exact = loan_eligibility_exact(income, existing, value)
+    approx = loan_eligibility(income, existing, value)
+    for key in AMOUNTS + ('debt_to_income_ratio',):
+        assert isinstance(exact[key], Decimal)
+        assert abs(float(exact[key]) - approx[key]) <= PAISA * 1.001, key
+
+
+@settings(max_examples=500)
+@given(incomes, emis, properties)
+def test_exact_path_rounds_affordable_emi_to_paise(income, existing, value):
+    # The exact path rounds the affordable EMI to a whole paisa before sizing the loan,
+    # so the loan amount may move by up to half a paisa of EMI x the annuity factor
+    exact = loan_eligibility_exact(income, existing, value)
+    approx = loan_eligibility(income, existing, value)
+    assert abs(float(exact['monthly_emi']) - approx['monthly_emi']) <= PAISA * 1.001
+    limit = PAISA / 2 * annuity_factor(INTEREST_RATE_ANNUAL, TENURE_MONTHS) + PAISA
+    assert abs(float(exact['eligible_loan_amount']) - approx['eligible_loan_amount']) <= limit
+
+
+@settings(max_examples=100)
+@given(st.lists(st.tuples(incomes, emis, properties), min_size=1, max_size=50))
+def test_batch_matches_scalar_row_by_row(applicants):
+    income, existing, value = (np.array(column) for column in zip(*applicants))
+    batch = loan_eligibility_batch(income, existing, value)
+    for i, row in enumerate(applicants):
+        scalar = loan_eligibility(*row)
+        for key in AMOUNTS + ('debt_to_income_ratio',):
+            assert batch[key][i] == pytest.approx(scalar[key], abs=PAISA * 1.001), key
+        if not near_band_limit(scalar['debt_to_income_ratio']):
+            assert batch['recommendation'][i] == scalar['recommendation']
+
+
+def test_dti_on_a_band_limit_takes_that_band():
+    # ₹1,00,000 income with ₹50,000 of EMIs is exactly 50% DTI
+    assert loan_eligibility(100_000, 50_000, 5_000_000)['recommendation'] == "Good - Moderate Risk"
+    assert loan_eligibility_exact(100_000, 50_000, 5_000_000)['recommendation'] == "Good - Moderate Risk"
@@ -0,0 +1,69 @@
+import numpy as np
+
+from news_pipeline import NewsStore, band_keys, clean_text, minhash, shingles
+
+HEADLINE = 'Markets rally as tech stocks climb on strong earnings from Apple and Microsoft'
+SUMMARY = ('Shares of the largest technology companies rose sharply on Tuesday after quarterly '
+           'results beat analyst estimates, lifting the Nasdaq to a record close.')
+
+
+def add(store, headline=HEADLINE, summary=SUMMARY, source='Reuters', url='', category='global'):
+    return store.add(category, headline, summary, source, url, published=1_700_000_000)
+
+
+def jaccard(a: str, b: str) -> float:
+    sa, sb = set(shingles(a).tolist()), set(shingles(b).tolist())
+    return len(sa & sb) / len(sa | sb)
+
+
+def test_signature_agreement_estimates_jaccard():
+    words = [f'w{i}' for i in range(400)]
+    rng = np.random.default_rng(7)
+    for _ in range(20):
+        a = ' '.join(rng.choice(words, 60))
+        b = ' '.join(rng.choice(words, 60)) if rng.random() < 0.5 else a.replace('w1 ', 'w2 ')
+        estimate = float(np.mean(minhash(a) == minhash(b)))
+        assert abs(estimate - jaccard(a, b)) < 0.25     # 64 permutations: sd <= 0.0625
+
+
+def test_identical_text_shares_every_band():
+    assert band_keys(minhash(HEADLINE)) == band_keys(minhash(HEADLINE))
+
+
+def test_reworded_copy_joins_the_first_story():
+    store = NewsStore()
+    assert add(store, url='https://a.example/1')
+    assert not add(store, headline=f'<b>{HEADLINE}</b>', summary=SUMMARY.replace('Tuesday', 'Wednesday'),
+                   source='Bloomberg', url='https://b.example/2')
+    store.rebuild_index()
+    items = store.page('global', 1, 10)['items']
+    assert len(items) == 1
+    assert items[0]['sources'] == ['Reuters', 'Bloomberg']
+
+
+def test_unrelated_story_and_other_category_stay_separate():
+    store = NewsStore()
+    assert add(store)
+    assert add(store, headline='Oil slides as OPEC signals higher output next quarter',
+               summary='Brent crude fell three percent after the cartel said members would pump more.')
+    assert add(store, category='india')    # LSH buckets are scoped per category
+
+
+def test_repeated_url_is_dropped():
+    store = NewsStore()
+    assert add(store, url='https://a.example/1')
+    assert not add(store, headline='Something else entirely happened today in the markets',
+                   url='https://a.example/1')
+
+
+def test_evicted_story_can_be_added_again():
+    store = NewsStore(max_articles=1)
+    assert add(store, url='https://a.example/1')
+    assert add(store, headline='Oil slides as OPEC signals higher output next quarter', summary='')
+    assert add(store, url='https://a.example/1')
+
+
+def test_clean_text_strips_markup_and_truncates():
+    assert clean_text('<p>Stocks &amp; bonds\n\n rise</p>') == 'Stocks & bonds rise'
+    assert clean_text('x' * 300, limit=20) == 'x' * 17 + '...'
+    assert clean_text(None) == ''
@@ -0,0 +1,87 @@
+import pytest
+from hypothesis import given, settings, strategies as st
+
+import rate_limit
+from rate_limit import ConcurrencyLimit, LocalBuckets, RateLimited, RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, 'monotonic', clock)
+    return clock
+
+
+def test_burst_then_wait_for_refill(clock):
+    buckets = LocalBuckets()
+    assert [buckets.take('ip', rate=2, burst=3) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert buckets.take('ip', rate=2, burst=3) == pytest.approx(0.5)
+
+    clock.now += 0.25
+    assert buckets.take('ip', rate=2, burst=3) == pytest.approx(0.25)
+    clock.now += 0.25
+    assert buckets.take('ip', rate=2, burst=3) == 0.0
+
+
+def test_idle_refill_is_capped_at_burst(clock):
+    buckets = LocalBuckets()
+    for _ in range(3):
+        buckets.take('ip', rate=1, burst=3)
+    clock.now += 3600
+    taken = [buckets.take('ip', rate=1, burst=3) for _ in range(4)]
+    assert taken[:3] == [0.0, 0.0, 0.0] and taken[3] > 0
+
+
+def test_keys_are_independent_and_lru_evicted(clock):
+    buckets = LocalBuckets(max_keys=2)
+    assert buckets.take('a', rate=1, burst=1) == 0.0
+    assert buckets.take('b', rate=1, burst=1) == 0.0
+    assert buckets.take('a', rate=1, burst=1) > 0     # touches a: b is now least recent
+    assert buckets.take('c', rate=1, burst=1) == 0.0  # evicts b
+    assert buckets.take('b', rate=1, burst=1) == 0.0  # evicts a; b starts full again
+    assert buckets.take('a', rate=1, burst=1) == 0.0
+
+
+@settings(max_examples=200)
+@given(st.floats(0.1, 50), st.integers(1, 20), st.lists(st.floats(0, 2), max_size=200))
+def test_never_allows_more_than_burst_plus_refill(rate, burst, gaps):
+    clock = Clock()
+    original, rate_limit.time.monotonic = rate_limit.time.monotonic, clock
+    try:
+        buckets, allowed = LocalBuckets(), 0
+        for gap in gaps:
+            clock.now += gap
+            allowed += buckets.take('k', rate, burst) == 0.0
+    finally:
+        rate_limit.time.monotonic = original
+    assert allowed <= burst + rate * sum(gaps) + 1e-9
+
+
+def test_limiter_raises_with_retry_after(clock):
+    limiter = RateLimiter('session', rate=0.5, burst=1)
+    limiter.check('s1')
+    with pytest.raises(RateLimited) as raised:
+        limiter.check('s1')
+    assert raised.value.status_code == 429
+    assert raised.value.scope == 'session'
+    assert raised.value.retry_after_header == '2'
+    limiter.check('s2')
+
+
+def test_concurrency_limit_rejects_instead_of_queueing():
+    limit = ConcurrencyLimit(1)
+    with limit.slot():
+        with pytest.raises(RateLimited) as raised:
+            with limit.slot():
+                pass
+    assert raised.value.status_code == 503
+    with limit.slot():
+        pass
@@ -0,0 +1,112 @@
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from dialog_state import DialogState, SessionState
+from session_store import HEADER, SessionStore, encode_frame, read_frames
+
+# NUL is stripped by the encoder, so it's left out of generated strings
+text = st.text(st.characters(blacklist_characters='\x00'), max_size=40)
+sessions = st.builds(SessionState, st.sampled_from(list(DialogState)),
+                     st.none() | st.sampled_from(['loan_eligibility_check', 'loan_interest_info']),
+                     st.none() | text, text)
+records = st.lists(st.tuples(text, st.none() | sessions), max_size=30, unique_by=lambda r: r[0])
+
+
+def session(query: str) -> SessionState:
+    return SessionState(DialogState.AWAITING_BANK, 'loan_eligibility_check', 'SBI', query)
+
+
+def reopen(directory) -> SessionStore:
+    store = SessionStore(str(directory), fsync=False)
+    store.restore()
+    return store
+
+
+@settings(max_examples=200)
+@given(records, st.integers(0, 2 ** 63))
+def test_frame_round_trip(rows, seq):
+    data = encode_frame(rows, seq)
+    frames, valid = read_frames(data)
+    assert valid == len(data)
+    assert [f.seq for f in frames] == [seq]
+    assert list(frames[0].records()) == rows
+    assert [frames[0].session(i) for i in range(len(rows))] == [s for _, s in rows]
+
+
+def test_corrupt_frame_ends_the_valid_prefix():
+    first = encode_frame([('a', session('one'))], 1)
+    second = bytearray(encode_frame([('b', session('two'))], 2))
+    second[HEADER.size + 3] ^= 0xFF     # payload byte: crc no longer matches
+    third = encode_frame([('c', session('three'))], 3)
+
+    frames, valid = read_frames(first + bytes(second) + third)
+    assert [f.seq for f in frames] == [1]
+    assert valid == len(first)
+
+
+def test_torn_log_tail_is_truncated_on_restore(tmp_path):
+    store = SessionStore(str(tmp_path), fsync=False)
+    store['a'] = session('kept')
+    store.flush()
+    with open(store.log_path, 'ab') as f:
+        f.write(encode_frame([('b', session('torn'))], 2)[:-5])
+
+    restored = reopen(tmp_path)
+    assert restored.get('a').original_query == 'kept'
+    assert 'b' not in restored
+    assert restored.log_bytes == store.log_bytes
+
+
+def test_tombstone_hides_a_cold_session(tmp_path):
+    store = SessionStore(str(tmp_path), fsync=False)
+    store['a'], store['b'] = session('a'), session('b')
+    store.flush()
+    store.compact()
+
+    cold = reopen(tmp_path)
+    assert cold.pop('a').original_query == 'a'
+    cold.flush()
+
+    restored = reopen(tmp_path)
+    assert 'a' not in restored
+    assert restored.get('b').original_query == 'b'
+    assert len(restored) == 1
+
+
+def test_log_frames_in_the_snapshot_are_skipped(tmp_path):
+    store = SessionStore(str(tmp_path), fsync=False)
+    store['a'] = session('old')
+    store.flush()
+    with open(store.log_path, 'rb') as f:
+        stale_log = f.read()
+    store['a'] = session('new')
+    store.flush()
+    store.compact()
+
+    # Crash after the snapshot was replaced but before the log was emptied
+    with open(store.log_path, 'wb') as f:
+        f.write(stale_log)
+
+    restored = reopen(tmp_path)
+    assert restored.get('a').original_query == 'new'
+
+
+def test_failed_flush_keeps_the_batch_for_the_next_one(tmp_path):
+    store = SessionStore(str(tmp_path), fsync=False)
+    store['a'] = session('first')
+    store.flush()
+    good_bytes = store.log_bytes
+
+    def disk_full(f):
+        raise OSError('disk full')
+
+    sync, store._sync = store._sync, disk_full
+    store['b'] = session('lost?')
+    with pytest.raises(OSError):
+        store.flush()
+    assert store.log_bytes == good_bytes
+
+    store['b'] = session('newer')
+    store._sync = sync
+    assert store.flush() == 1
+    assert reopen(tmp_path).get('b').original_query == 'newer'
@@ -1,8 +1,15 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import './App.css';
 import { fetchMarketData } from './services/marketDataService';
 import { fetchMarketNews } from './services/newsService';
 import { fetchChartData, fetchCommodityData, formatChartLabel } from './services/chartDataService'; // ← Added formatChartLabel
+import { ChatServerError, sendChatMessage } from './services/chatService';
+
+// Chart resolution follows the canvas: ~8px per bar (bars max out at 16px)
+const CHART_BAR_PX = 8;
+const CHART_WIDTH_STEP = 5;
+const CHART_MIN_POINTS = 10;
+const CHART_MAX_POINTS = 200;
 
 function App() {
   const [messages, setMessages] = useState([
@@ -12,6 +19,9 @@ function App() {
     }
   ]);
   const [inputMessage, setInputMessage] = useState('');
+  // One turn at a time: a new send waits until the current reply's done/error
+  const [sending, setSending] = useState(false);
+  const sendingRef = useRef(false);
   const [darkMode, setDarkMode] = useState(false);
   const [marketData, setMarketData] = useState({
     indices: [],
@@ -28,6 +38,9 @@ function App() {
   const [chartPeriod, setChartPeriod] = useState('1M');
   const [chartLoading, setChartLoading] = useState(false);
   const [chartDataCache, setChartDataCache] = useState({});
+  // Points to ask /chart for: one bar per CHART_BAR_PX of the measured canvas
+  const chartCanvasRef = useRef(null);
+  const [chartWidth, setChartWidth] = useState(null);
   const [stockAssets, setStockAssets] = useState([]);
   const [commodityAssets, setCommodityAssets] = useState([
     { 
@@ -97,12 +110,31 @@ function App() {
     }
   }, [darkMode]);
 
+  // Re-measure on resize; rounded to CHART_WIDTH_STEP so dragging a window
+  // edge doesn't refetch on every pixel
   useEffect(() => {
+    const canvas = chartCanvasRef.current;
+    if (!canvas) return;
+    const measure = (pixels) => {
+      const points = Math.floor(pixels / CHART_BAR_PX / CHART_WIDTH_STEP) * CHART_WIDTH_STEP;
+      setChartWidth(Math.min(CHART_MAX_POINTS, Math.max(CHART_MIN_POINTS, points)));
+    };
+    if (typeof ResizeObserver === 'undefined') {
+      measure(canvas.clientWidth);
+      return;
+    }
+    const observer = new ResizeObserver(entries => measure(entries[0].contentRect.width));
+    observer.observe(canvas);
+    return () => observer.disconnect();
+  }, []);
+
+  useEffect(() => {
+    if (!chartWidth) return;   // not measured yet
     const currentCategory = chartCategory === 'stocks' ? stockAssets : commodityAssets;
     const currentAsset = currentCategory[currentChartIndex];
     
     if (currentAsset && currentAsset.symbol) {
-      loadChartData(currentAsset.symbol, chartCategory, chartPeriod).then(result => {
+      loadChartData(currentAsset.symbol, chartCategory, chartPeriod, chartWidth).then(result => {
         if (chartCategory === 'stocks') {
           setStockAssets(prev => {
             const updated = [...prev];
@@ -132,7 +164,7 @@ function App() {
         }
       });
     }
-  }, [currentChartIndex, chartCategory, chartPeriod, stockAssets.length]);
+  }, [currentChartIndex, chartCategory, chartPeriod, chartWidth, stockAssets.length]);
 
   const loadData = async () => {
     try {
@@ -165,8 +197,8 @@ function App() {
     }
   };
   
-  const loadChartData = async (symbol, category, period) => {
-    const cacheKey = `${symbol}-${period}`;
+  const loadChartData = async (symbol, category, period, width) => {
+    const cacheKey = category === 'stocks' ? `${symbol}-${period}-${width}` : `${symbol}-${period}`;
     
     if (chartDataCache[cacheKey]) {
       return chartDataCache[cacheKey];
@@ -176,7 +208,7 @@ function App() {
     try {
       let result;
       if (category === 'stocks') {
-        result = await fetchChartData(symbol, period);
+        result = await fetchChartData(symbol, period, width);
       } else {
         result = await fetchCommodityData(symbol, period);
       }
@@ -328,40 +360,38 @@ function App() {
   };
 
   const handleSendMessage = async () => {
-    if (!inputMessage.trim()) return;
+    if (!inputMessage.trim() || sendingRef.current) return;
 
     const userMessage = inputMessage;
-    setMessages([...messages, { type: 'user', text: userMessage }]);
+    const turnId = `${Date.now()}-${Math.random()}`;
+    sendingRef.current = true;
+    setSending(true);
+    setMessages(prev => [...prev, { type: 'user', text: userMessage }]);
     setInputMessage('');
 
     try {
-      const response = await fetch('http://localhost:8000/chat', {
-        method: 'POST',
-        headers: { 
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ 
-          session_id: 'user123',
-          user_input: userMessage 
-        })
+      // Render the message as soon as it streams in, then fill in workflows/options
+      await sendChatMessage('user123', userMessage, (data) => {
+        const botMessage = { type: 'bot', data: data, turnId };
+        setMessages(prev => prev.some(m => m.turnId === turnId)
+          ? prev.map(m => (m.turnId === turnId ? botMessage : m))
+          : [...prev, botMessage]
+        );
       });
-
-      if (!response.ok) {
-        throw new Error(`Backend returned ${response.status}`);
-      }
-
-      const data = await response.json();
-      
-      setMessages(prev => [...prev, { 
-        type: 'bot', 
-        data: data
-      }]);
     } catch (error) {
+      if (error instanceof ChatServerError) {
+        const wait = error.retryAfter ? ` Please try again in ${Math.ceil(error.retryAfter)}s.` : '';
+        setMessages(prev => [...prev, { type: 'bot', text: `Sorry, I couldn't handle that message (${error.message}).${wait}` }]);
+        return;
+      }
       console.error('Backend connection error:', error);
       setMessages(prev => [...prev, { 
         type: 'bot', 
         text: "Sorry, I'm having trouble connecting to the backend."
       }]);
+    } finally {
+      sendingRef.current = false;
+      setSending(false);
     }
   };
 
@@ -431,7 +461,7 @@ function App() {
                 onChange={(e) => setInputMessage(e.target.value)}
                 onKeyPress={handleKeyPress}
               />
-              <button className="send-button" onClick={handleSendMessage}>
+              <button className="send-button" onClick={handleSendMessage} disabled={sending}>
                 Send
               </button>
             </div>
@@ -598,7 +628,7 @@ function App() {
                 ))}
               </div>
               
-<div className="chart-canvas">
+<div className="chart-canvas" ref={chartCanvasRef}>
   {chartLoading ? (
     <div className="chart-loading">Loading...</div>
   ) : (
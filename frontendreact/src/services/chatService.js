@@ -0,0 +1,146 @@
+// Streaming chat transport: one WebSocket per session, SSE as fallback
+const API_BASE_URL = 'http://localhost:8000';
+const WS_BASE_URL = 'ws://localhost:8000';
+
+let socket = null;
+let socketSessionId = null;
+// Turns in flight, oldest first. The server answers a socket's messages
+// strictly in order, so every frame belongs to the head of the queue.
+let pendingTurns = [];
+
+// The server answered but refused the turn (rate limit, inference cap,
+// bad input). Not a transport failure, so it is never retried over SSE.
+export class ChatServerError extends Error {
+  constructor(detail, retryAfter = null) {
+    super(detail);
+    this.name = 'ChatServerError';
+    this.retryAfter = retryAfter;
+  }
+}
+
+// Folds one streamed section into the same shape /chat returns
+const applySection = (data, event, payload) => {
+  switch (event) {
+    case 'message': {
+      const { type, message, ...meta } = payload;
+      return { ...meta, response: { ...data.response, type, message } };
+    }
+    case 'workflow':
+      return {
+        ...data,
+        response: { ...data.response, workflows: [...(data.response.workflows || []), payload] }
+      };
+    default:
+      return { ...data, response: { ...data.response, [event]: payload } };
+  }
+};
+
+const openSocket = (sessionId) => new Promise((resolve, reject) => {
+  if (socket && socketSessionId === sessionId && socket.readyState === WebSocket.OPEN) {
+    resolve(socket);
+    return;
+  }
+
+  const ws = new WebSocket(`${WS_BASE_URL}/ws/chat/${encodeURIComponent(sessionId)}`);
+
+  ws.onopen = () => {
+    socket = ws;
+    socketSessionId = sessionId;
+    resolve(ws);
+  };
+
+  ws.onerror = (error) => {
+    if (socket !== ws) reject(error);
+  };
+
+  ws.onclose = () => {
+    if (socket === ws) socket = null;
+    const dropped = pendingTurns.filter(turn => turn.ws === ws);
+    pendingTurns = pendingTurns.filter(turn => turn.ws !== ws);
+    dropped.forEach(turn => turn.reject(new Error('Chat socket closed')));
+  };
+
+  ws.onmessage = (message) => {
+    const turn = pendingTurns.find(t => t.ws === ws);
+    if (!turn) return;
+    const { event, data: payload } = JSON.parse(message.data);
+
+    if (event === 'error' || event === 'done') {
+      pendingTurns = pendingTurns.filter(t => t !== turn);
+      if (event === 'error') {
+        turn.reject(new ChatServerError(payload.detail, payload.retry_after ?? null));
+      } else {
+        turn.resolve(turn.data);
+      }
+      return;
+    }
+
+    turn.data = applySection(turn.data, event, payload);
+    turn.onUpdate(turn.data);
+  };
+});
+
+const sendOverSocket = async (sessionId, userInput, onUpdate) => {
+  const ws = await openSocket(sessionId);
+
+  return new Promise((resolve, reject) => {
+    pendingTurns.push({ ws, data: { response: {} }, onUpdate, resolve, reject });
+    ws.send(JSON.stringify({ user_input: userInput }));
+  });
+};
+
+const sendOverSSE = async (sessionId, userInput, onUpdate) => {
+  const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ session_id: sessionId, user_input: userInput })
+  });
+
+  if (!response.ok) {
+    const body = await response.json().catch(() => ({}));
+    const retryAfter = response.headers.get('Retry-After');
+    throw new ChatServerError(body.detail || `Backend returned ${response.status}`,
+                              retryAfter ? Number(retryAfter) : null);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let data = { response: {} };
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    const frames = buffer.split('\n\n');
+    buffer = frames.pop();
+
+    for (const frame of frames) {
+      const event = frame.match(/^event: (.*)$/m)?.[1];
+      const payload = frame.match(/^data: (.*)$/m)?.[1];
+      if (!event || event === 'done') continue;
+
+      data = applySection(data, event, JSON.parse(payload));
+      onUpdate(data);
+    }
+  }
+
+  return data;
+};
+
+// Sends one chat turn; onUpdate receives the partially assembled response
+// as each section arrives. Resolves with the complete response. Falls back
+// to SSE only when the socket can't open or drops mid-turn; a turn the
+// server refused rejects with ChatServerError.
+export const sendChatMessage = async (sessionId, userInput, onUpdate = () => {}) => {
+  if (typeof WebSocket !== 'undefined') {
+    try {
+      return await sendOverSocket(sessionId, userInput, onUpdate);
+    } catch (error) {
+      if (error instanceof ChatServerError) throw error;
+      console.warn('WebSocket chat failed, falling back to SSE:', error);
+    }
+  }
+  return sendOverSSE(sessionId, userInput, onUpdate);
+};